@@ -0,0 +1,174 @@
+'''
+Сравнение движков прогнозирования воркера: стоимость обучения и прогноза и ошибка
+на фиксированном локальном наборе данных, без Redis, RabbitMQ и сервиса погоды.
+
+Набор - дневная история городов: JSON со списком записей /weather/range по городам
+({"Moscow": [{"date": ..., "temp_min": ..., ...}, ...], ...}, --data) или, по умолчанию,
+детерминированный ряд benchmarks/fake_openmeteo.py за --years лет. Для каждого движка
+и города модель обучается на --origins последовательных днях истории (как воркер после
+каждого нового дня) и прогнозирует на --horizon дней вперёд; ошибка - MAE температур.
+
+Для каждого движка печатается строка JSON: окно истории, время обучения одного окна
+(среднее и p95), время прогноза, MAE в целом и на первый и последний день горизонта,
+размер модели в кеше. С --output строки дописываются в файл, --label помечает прогон.
+
+Пример:
+    python benchmarks/engine_bench.py --label baseline --output engines.jsonl
+    python benchmarks/engine_bench.py --engines numpy incremental --history-days numpy=1095 incremental=1095
+'''
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent
+sys.path.insert(0, str(ROOT.parent / 'services' / 'forecast'))
+# Настройки воркера требуют параметров подключения; в этом прогоне они не используются
+for name in ('WEATHER_HOST', 'REDIS_HOST', 'RABBITMQ_HOST', 'RABBITMQ_USER', 'RABBITMQ_PASS', 'RABBITMQ_FC_REQ_QUEUE'):
+    os.environ.setdefault(name, 'localhost')
+for name in ('WEATHER_PORT', 'REDIS_PORT', 'RABBITMQ_PORT'):
+    os.environ.setdefault(name, '0')
+
+from engines import ENGINE_MODULES, load_engine          # noqa: E402
+from fake_openmeteo import daily_values                  # noqa: E402
+from forecast_model import TARGET_COLS, days_matrix      # noqa: E402
+from settings import settings                            # noqa: E402
+
+CITIES = {
+    "Moscow": 55.7558, "London": 51.5074, "Sydney": -33.8688, "Delhi": 28.6139,
+}
+
+
+def generated_dataset(years: int, end: date) -> dict:
+    '''История городов из подменного Open-Meteo: те же значения, что он отдаёт сервису погоды'''
+    start = end - timedelta(days=365 * years)
+    days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    dataset = {}
+    for city, latitude in CITIES.items():
+        records = []
+        for day in days:
+            v = daily_values(latitude, day)
+            records.append({
+                'date': day.isoformat(),
+                'temp_min': v['temperature_2m_min'],
+                'temp_avg': v['temperature_2m_mean'],
+                'temp_max': v['temperature_2m_max'],
+                'humidity_min': v['relative_humidity_2m_min'],
+                'humidity_avg': v['relative_humidity_2m_mean'],
+                'humidity_max': v['relative_humidity_2m_max'],
+                'precipitation': v['precipitation_sum'],
+            })
+        dataset[city] = records
+    return dataset
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, max(0, round(q / 100 * (len(values) - 1))))]
+
+
+def run_engine(name: str, dataset: dict, history_days: int, origins: int, horizon: int) -> dict:
+    engine = load_engine(name)
+    incremental = getattr(engine, 'INCREMENTAL', False)
+    fit_times, predict_times, errors, model_bytes = [], [], [], []
+
+    for city, records in dataset.items():
+        first = date.fromisoformat(records[0]['date'])
+        last = date.fromisoformat(records[-1]['date'])
+        days = days_matrix(records, first, last)
+        actual = {date.fromisoformat(r['date']): [r[col] for col in TARGET_COLS] for r in records}
+        stats = None
+
+        for k in range(origins):
+            end_date = last - timedelta(days=horizon + origins - 1 - k)
+            start_date = end_date - timedelta(days=history_days - 1)
+            if start_date < first:
+                raise SystemExit(f'Not enough data for {name}: need {history_days} days before {end_date}')
+            window = (start_date, end_date)
+
+            if incremental:
+                segments = [
+                    (lo, days[(lo - first).days:(hi - first).days + 1])
+                    for lo, hi in engine.history_spans([window], stats)
+                ]
+                t0 = time.perf_counter()
+                models, stats = engine.fit_window_models(segments, [window], history_days, stats)
+            else:
+                window_records = records[(start_date - first).days:(end_date - first).days + 1]
+                t0 = time.perf_counter()
+                models = engine.fit_window_models(window_records, [window], history_days)
+            fit_times.append(time.perf_counter() - t0)
+
+            model = models[window]
+            dates = [end_date + timedelta(days=h) for h in range(1, horizon + 1)]
+            t0 = time.perf_counter()
+            preds = model.predict_many(dates)
+            predict_times.append(time.perf_counter() - t0)
+            model_bytes.append(len(model.to_bytes()))
+
+            errors.append([
+                np.mean([abs(p[col] - a) for col, a in zip(TARGET_COLS, actual[d])])
+                for d, p in zip(dates, preds)
+            ])
+
+    errors = np.array(errors)
+    return {
+        'engine': name,
+        'history_days': history_days,
+        'cities': len(dataset),
+        'models': len(fit_times),
+        'fit_ms_mean': round(np.mean(fit_times) * 1000, 3),
+        'fit_ms_p95': round(percentile(fit_times, 95) * 1000, 3),
+        'predict_ms_mean': round(np.mean(predict_times) * 1000, 4),
+        'mae': round(float(errors.mean()), 3),
+        'mae_h1': round(float(errors[:, 0].mean()), 3),
+        f'mae_h{horizon}': round(float(errors[:, -1].mean()), 3),
+        'model_bytes': int(np.mean(model_bytes)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--engines', nargs='+', choices=list(ENGINE_MODULES), default=list(ENGINE_MODULES))
+    parser.add_argument('--data', default=None, help='JSON с историей по городам; по умолчанию - сгенерированная')
+    parser.add_argument('--years', type=int, default=7, help='Лет сгенерированной истории')
+    parser.add_argument('--origins', type=int, default=60, help='Дней, на конец которых обучается модель')
+    parser.add_argument('--horizon', type=int, default=7, help='Дней прогноза вперёд')
+    parser.add_argument('--history-days', nargs='*', default=[], metavar='ENGINE=DAYS',
+                        help='Окно истории движка; по умолчанию - из настроек воркера')
+    parser.add_argument('--label', default=None, help='Метка прогона в выводе')
+    parser.add_argument('--output', default=None, help='Файл, в который дописываются строки JSON')
+    args = parser.parse_args()
+
+    overrides = {name: int(days) for name, days in (item.split('=', 1) for item in args.history_days)}
+    if args.data:
+        with open(args.data) as f:
+            dataset = json.load(f)
+    else:
+        dataset = generated_dataset(args.years, date(2025, 12, 31))
+
+    results = []
+    for name in args.engines:
+        history_days = overrides.get(name, settings.ENGINE_HISTORY_DAYS.get(name, settings.FORECAST_HISTORY_DAYS))
+        try:
+            result = run_engine(name, dataset, history_days, args.origins, args.horizon)
+        except ImportError as e:
+            result = {'engine': name, 'skipped': repr(e)}
+        if args.label:
+            result = {'label': args.label, **result}
+        results.append(result)
+        print(json.dumps(result), flush=True)
+
+    if args.output:
+        with open(args.output, 'a') as f:
+            for result in results:
+                f.write(json.dumps(result) + '\n')
+
+
+if __name__ == '__main__':
+    main()
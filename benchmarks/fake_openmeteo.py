@@ -0,0 +1,113 @@
+'''
+Локальная замена архивного API Open-Meteo для нагрузочных тестов.
+
+Отдаёт детерминированные дневные ряды за любой интервал дат в формате
+/v1/archive, с настраиваемой задержкой и долей ошибок. GET /stats
+возвращает число обращений к архиву (в том числе ошибочных), POST /reset
+обнуляет счётчики.
+
+Пример:
+    python benchmarks/fake_openmeteo.py --port 9009 --latency 0.15 --jitter 0.05 --error-rate 0.01
+Сервис погоды направляется на него через ARCHIVE_WEATHER_URL=http://localhost:9009/v1/archive
+'''
+import argparse
+import asyncio
+import math
+import random
+from collections import Counter
+from datetime import date, timedelta
+
+from aiohttp import web
+
+DAILY_PARAMS = [
+    "temperature_2m_mean",
+    "temperature_2m_min",
+    "temperature_2m_max",
+    "precipitation_sum",
+    "relative_humidity_2m_mean",
+    "relative_humidity_2m_max",
+    "relative_humidity_2m_min",
+]
+
+
+def daily_values(latitude: float, day: date) -> dict:
+    '''Сезонный ход температуры и влажности: одинаковый для одной точки и даты при каждом запуске'''
+    season = math.cos(2 * math.pi * (day.timetuple().tm_yday - 200) / 365.25)
+    if latitude < 0:
+        season = -season
+    mean = 12 + 12 * season + 3 * math.sin(day.toordinal() * 0.7)
+    humidity = 70 - 10 * season + 5 * math.cos(day.toordinal() * 1.3)
+    return {
+        "temperature_2m_mean": round(mean, 1),
+        "temperature_2m_min": round(mean - 5, 1),
+        "temperature_2m_max": round(mean + 5, 1),
+        "precipitation_sum": round(max(0.0, 4 * math.sin(day.toordinal() * 2.1)), 1),
+        "relative_humidity_2m_mean": round(humidity),
+        "relative_humidity_2m_max": round(min(100, humidity + 15)),
+        "relative_humidity_2m_min": round(max(0, humidity - 15)),
+    }
+
+
+def create_app(latency: float, jitter: float, error_rate: float) -> web.Application:
+    counters = Counter(calls=0, errors=0, days=0)
+
+    async def archive(request: web.Request) -> web.Response:
+        counters['calls'] += 1
+        delay = latency + random.uniform(0, jitter)
+        if delay:
+            await asyncio.sleep(delay)
+        if random.random() < error_rate:
+            counters['errors'] += 1
+            return web.json_response({'error': True, 'reason': 'Injected failure'}, status=503)
+
+        query = request.query
+        latitude = float(query['latitude'])
+        start = date.fromisoformat(query['start_date'])
+        end = date.fromisoformat(query['end_date'])
+        days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+        counters['days'] += len(days)
+
+        values = [daily_values(latitude, day) for day in days]
+        daily = {'time': [day.isoformat() for day in days]}
+        for param in DAILY_PARAMS:
+            daily[param] = [v[param] for v in values]
+        return web.json_response({
+            'latitude': latitude,
+            'longitude': float(query['longitude']),
+            'generationtime_ms': 0.1,
+            'utc_offset_seconds': 0,
+            'timezone': 'GMT',
+            'timezone_abbreviation': 'GMT',
+            'elevation': 100.0,
+            'daily_units': {param: '' for param in DAILY_PARAMS},
+            'daily': daily,
+        })
+
+    async def stats(request: web.Request) -> web.Response:
+        return web.json_response(dict(counters))
+
+    async def reset(request: web.Request) -> web.Response:
+        for key in counters:
+            counters[key] = 0
+        return web.json_response(dict(counters))
+
+    app = web.Application()
+    app.router.add_get('/v1/archive', archive)
+    app.router.add_get('/stats', stats)
+    app.router.add_post('/reset', reset)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=9009)
+    parser.add_argument('--latency', type=float, default=0.1, help='Базовая задержка ответа, секунды')
+    parser.add_argument('--jitter', type=float, default=0.05, help='Случайная добавка к задержке, секунды')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Доля ответов 503')
+    args = parser.parse_args()
+    web.run_app(create_app(args.latency, args.jitter, args.error_rate), host=args.host, port=args.port, print=None)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+'''
+Сравнение движков линейной модели прогноза: sklearn (predictor) и numpy (predictor_numpy).
+
+Проверяет численное совпадение моделей на окнах синтетической истории
+(окна, где у sklearn решение определяется шумом округления, считаются отдельно),
+затем измеряет время обучения+прогноза на одну задачу, пакетное обучение
+нескольких городов и время импорта модуля движка в чистом интерпретаторе.
+
+Пример:
+    python benchmarks/forecast_engines.py --jobs 500
+'''
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+
+FORECAST_DIR = Path(__file__).resolve().parent.parent / 'services' / 'forecast'
+sys.path.insert(0, str(FORECAST_DIR))
+
+# Обязательные настройки сервиса прогноза; для замеров подключения не нужны
+SETTINGS_ENV = {
+    'WEATHER_HOST': 'localhost', 'WEATHER_PORT': '80',
+    'REDIS_HOST': 'localhost', 'REDIS_PORT': '6379',
+    'RABBITMQ_HOST': 'localhost', 'RABBITMQ_PORT': '5672',
+    'RABBITMQ_USER': 'guest', 'RABBITMQ_PASS': 'guest',
+    'RABBITMQ_FC_REQ_QUEUE': 'forecast_requests',
+}
+for key, value in SETTINGS_ENV.items():
+    os.environ.setdefault(key, value)
+
+
+def synthetic_records(days: int, seed: int, end: date) -> list[dict]:
+    '''Сезонный ряд с шумом в формате ответа /weather/range'''
+    rng = np.random.default_rng(seed)
+    records = []
+    for i in range(days):
+        day = end - timedelta(days=days - 1 - i)
+        season = 10 * np.sin(2 * np.pi * day.timetuple().tm_yday / 365.25)
+        avg = season + rng.normal(0, 3)
+        records.append({
+            'date': day.isoformat(),
+            'temp_min': avg - abs(rng.normal(4, 1)),
+            'temp_avg': avg,
+            'temp_max': avg + abs(rng.normal(4, 1)),
+            'humidity_min': 40 + rng.normal(0, 5),
+            'humidity_avg': 60 + rng.normal(0, 5),
+            'humidity_max': 80 + rng.normal(0, 5),
+            'precipitation': max(0.0, rng.normal(1, 2)),
+        })
+    return records
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return float(np.median(samples))
+
+
+def import_time(module: str) -> float:
+    code = f'import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)'
+    out = subprocess.run(
+        [sys.executable, '-c', code],
+        cwd=FORECAST_DIR, env={**os.environ}, capture_output=True, text=True, check=True
+    )
+    return float(out.stdout.strip())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--jobs', type=int, default=200, help='Повторов обучения+прогноза на движок')
+    parser.add_argument('--history-days', type=int, default=7)
+    parser.add_argument('--cities', type=int, default=11)
+    args = parser.parse_args()
+
+    import predictor
+    import predictor_numpy
+    from forecast_model import training_window
+
+    engines = {'sklearn': predictor, 'numpy': predictor_numpy}
+    today = date.today()
+    records = synthetic_records(400, seed=42, end=today - timedelta(days=2))
+
+    # Совпадение моделей на всех окнах за последние 300 дней
+    windows = sorted({
+        training_window(today - timedelta(days=k), args.history_days) for k in range(300)
+    })
+    ref = predictor.fit_window_models(records, windows, args.history_days)
+    new = predictor_numpy.fit_window_models(records, windows, args.history_days)
+    dates, feats = predictor_numpy.history_arrays(records)
+    max_diff, rank_deficient = 0.0, 0
+    for w in windows:
+        a = np.array([list(f.values())[1:] for f in ref[w].predict_many([today])])
+        b = np.array([list(f.values())[1:] for f in new[w].predict_many([today])])
+        diff = float(abs(a - b).max())
+        if diff <= 1e-6:
+            max_diff = max(max_diff, diff)
+            continue
+        # Расхождение допустимо, только если у sklearn в решение попало сингулярное
+        # число на уровне ошибок округления (окно короче числа признаков)
+        rows = (dates >= w[0].toordinal()) & (dates <= w[1].toordinal())
+        X = feats[rows][:-1]
+        Xs = (X - X.mean(axis=0)) / np.where(X.std(axis=0) > 0, X.std(axis=0), 1)
+        sv = np.linalg.svd(Xs, compute_uv=False)
+        if sv[-1] > 1e-12 * sv[0]:
+            raise SystemExit(f'Engines disagree on window {w}: max abs difference {diff}')
+        rank_deficient += 1
+
+    window = [training_window(today, args.history_days)]
+    result = {
+        'parity_windows': len(windows),
+        'parity_max_abs_diff': max_diff,
+        'parity_rank_deficient': rank_deficient,
+        'per_job_ms': {},
+        'import_s': {},
+    }
+    for name, engine in engines.items():
+        def job():
+            engine.fit_window_models(records, window, args.history_days)[window[0]].predict_many([today])
+        result['per_job_ms'][name] = round(timed(job, args.jobs) * 1000, 3)
+        result['import_s'][name] = round(import_time(engine.__name__), 3)
+
+    # Пакетное обучение: все города одним решением против цикла по городам
+    series = [
+        predictor_numpy.history_arrays(synthetic_records(args.history_days, seed=i, end=today))[1]
+        for i in range(args.cities)
+    ]
+    result['cities_fit_ms'] = {
+        'numpy_stacked': round(timed(lambda: predictor_numpy.fit_stacked(series), args.jobs) * 1000, 3),
+        'numpy_loop': round(timed(lambda: [predictor_numpy.fit_stacked([s]) for s in series], args.jobs) * 1000, 3),
+    }
+    print(json.dumps(result))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,216 @@
+'''
+Сценарные нагрузочные тесты сервиса погоды и воркера прогнозов.
+
+Сценарии:
+    cold            /weather по ещё не запрошенным датам: каждый запрос идёт в Open-Meteo
+    hot             /weather по заранее прогретым датам: только кеши сервиса
+    forecast-burst  всплеск POST /forecast по сетке город x неделя вперёд (с повторами),
+                    каждый клиент дожидается результата через GET /forecast?wait=
+    mixed           чтение погоды вперемешку с прогнозами (доля прогнозов --forecast-ratio)
+
+Для каждого сценария печатается строка JSON: число операций, ошибки и коды ответов,
+throughput, p50/p95/p99 задержки и число обращений к Open-Meteo за сценарий
+(по счётчику /stats подменного сервера benchmarks/fake_openmeteo.py).
+С --output строки дописываются в файл, --label помечает прогон для сравнения.
+
+Пример (стенд из benchmarks/docker-compose.bench.yml):
+    docker compose -f benchmarks/docker-compose.bench.yml up -d --build
+    python benchmarks/scenarios.py --scenario all --requests 2000 --concurrency 64 --label baseline --output runs.jsonl
+'''
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import Counter
+from datetime import date, timedelta
+
+import aiohttp
+
+CITIES = [
+    "Moscow", "New-York", "Washington", "London", "Tokyo", "Paris",
+    "Sydney", "Berlin", "Rio-de-Janeiro", "Cape-Town", "Delhi",
+]
+SCENARIOS = ['cold', 'hot', 'forecast-burst', 'mixed']
+# Даты для hot: окно, которое заведомо есть в архиве
+HOT_DAYS = 30
+
+
+def percentile(values, q):
+    values = sorted(values)
+    idx = min(len(values) - 1, max(0, round(q / 100 * (len(values) - 1))))
+    return values[idx]
+
+
+def summarize(latencies):
+    if not latencies:
+        return {'p50_ms': None, 'p95_ms': None, 'p99_ms': None}
+    return {f'p{q}_ms': round(percentile(latencies, q) * 1000, 2) for q in (50, 95, 99)}
+
+
+class Runner:
+    def __init__(self, session: aiohttp.ClientSession, url: str, openmeteo_url: str | None,
+                 concurrency: int, wait: float, rng: random.Random):
+        self.session = session
+        self.url = url
+        self.openmeteo_url = openmeteo_url
+        self.concurrency = concurrency
+        self.wait = wait
+        self.rng = rng
+        self.statuses = Counter()
+
+    async def upstream_stats(self) -> dict:
+        if not self.openmeteo_url:
+            return {}
+        async with self.session.get(f'{self.openmeteo_url}/stats') as resp:
+            return await resp.json()
+
+    async def get_weather(self, city: str, day: date) -> bool:
+        async with self.session.get(f'{self.url}/weather', params={'city': city, 'date': day.isoformat()}) as resp:
+            await resp.read()
+            self.statuses[f'weather:{resp.status}'] += 1
+            return resp.status == 200
+
+    async def warm(self, city: str, start: date, end: date) -> None:
+        params = {'city': city, 'start': start.isoformat(), 'end': end.isoformat()}
+        async with self.session.get(f'{self.url}/weather/range', params=params) as resp:
+            await resp.read()
+
+    async def forecast(self, city: str, day: date) -> bool:
+        '''POST /forecast и ожидание результата: задержка - до получения прогноза'''
+        async with self.session.post(f'{self.url}/forecast', json={'city': city, 'date_': day.isoformat()}) as resp:
+            self.statuses[f'forecast_post:{resp.status}'] += 1
+            if resp.status == 202:
+                task_id = (await resp.json())['task_id']
+            elif resp.status == 409:
+                task_id = (await resp.json())['detail']['forecast_id']
+            else:
+                await resp.read()
+                return False
+
+        params = {'task_id': task_id, 'wait': self.wait}
+        async with self.session.get(f'{self.url}/forecast', params=params) as resp:
+            await resp.read()
+            self.statuses[f'forecast_get:{resp.status}'] += 1
+            return resp.status == 200
+
+    async def run_ops(self, ops: list) -> dict:
+        '''Выполняет операции (метка, корутина) с ограниченной параллельностью'''
+        latencies = {}
+        errors = 0
+        sem = asyncio.Semaphore(self.concurrency)
+
+        async def run_one(label, make_op):
+            nonlocal errors
+            async with sem:
+                t0 = time.perf_counter()
+                try:
+                    ok = await make_op()
+                except aiohttp.ClientError:
+                    ok = False
+                latencies.setdefault(label, []).append(time.perf_counter() - t0)
+                if not ok:
+                    errors += 1
+
+        self.statuses.clear()
+        before = await self.upstream_stats()
+        t0 = time.perf_counter()
+        await asyncio.gather(*(run_one(label, make_op) for label, make_op in ops))
+        duration = time.perf_counter() - t0
+        after = await self.upstream_stats()
+
+        everything = [value for values in latencies.values() for value in values]
+        result = {
+            'operations': len(ops),
+            'concurrency': self.concurrency,
+            'errors': errors,
+            'statuses': dict(self.statuses),
+            'duration_s': round(duration, 3),
+            'throughput_rps': round(len(ops) / duration, 1) if duration else None,
+            **summarize(everything),
+            'upstream_calls': after['calls'] - before['calls'] if before else None,
+            'upstream_errors': after['errors'] - before['errors'] if before else None,
+        }
+        if len(latencies) > 1:
+            result['by_operation'] = {label: {'operations': len(values), **summarize(values)}
+                                      for label, values in latencies.items()}
+        return result
+
+    def cold_keys(self, n: int) -> list:
+        '''Пары город/дата, которых ещё нет в кеше: случайные дни из давнего архива'''
+        start = date(1990, 1, 1) + timedelta(days=self.rng.randrange(365 * 20))
+        days = [start + timedelta(days=i) for i in range(max(1, n // len(CITIES) + 1))]
+        keys = [(city, day) for city in CITIES for day in days]
+        self.rng.shuffle(keys)
+        return keys[:n]
+
+    async def hot_keys(self) -> list:
+        end = date.today() - timedelta(days=7)
+        start = end - timedelta(days=HOT_DAYS - 1)
+        await asyncio.gather(*(self.warm(city, start, end) for city in CITIES))
+        return [(city, start + timedelta(days=i)) for city in CITIES for i in range(HOT_DAYS)]
+
+    def forecast_keys(self, n: int) -> list:
+        today = date.today()
+        return [(self.rng.choice(CITIES), today + timedelta(days=self.rng.randrange(7))) for _ in range(n)]
+
+    async def scenario(self, name: str, n: int, forecast_ratio: float) -> dict:
+        if name == 'cold':
+            ops = [('weather', lambda key=key: self.get_weather(*key)) for key in self.cold_keys(n)]
+        elif name == 'hot':
+            keys = await self.hot_keys()
+            ops = [('weather', lambda key=self.rng.choice(keys): self.get_weather(*key)) for _ in range(n)]
+        elif name == 'forecast-burst':
+            ops = [('forecast', lambda key=key: self.forecast(*key)) for key in self.forecast_keys(n)]
+        elif name == 'mixed':
+            keys = await self.hot_keys()
+            n_forecasts = round(n * forecast_ratio)
+            ops = [('forecast', lambda key=key: self.forecast(*key)) for key in self.forecast_keys(n_forecasts)]
+            ops += [('weather', lambda key=self.rng.choice(keys): self.get_weather(*key)) for _ in range(n - n_forecasts)]
+            self.rng.shuffle(ops)
+        else:
+            raise ValueError(f'Unknown scenario {name}')
+        return {'scenario': name, **await self.run_ops(ops)}
+
+
+async def run(args) -> list:
+    scenarios = SCENARIOS if 'all' in args.scenario else args.scenario
+    rng = random.Random(args.seed)
+    connector = aiohttp.TCPConnector(limit=args.concurrency)
+    timeout = aiohttp.ClientTimeout(total=args.wait + 30)
+    results = []
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        runner = Runner(session, args.url, args.openmeteo_url, args.concurrency, args.wait, rng)
+        for name in scenarios:
+            result = await runner.scenario(name, args.requests, args.forecast_ratio)
+            if args.label:
+                result = {'label': args.label, **result}
+            results.append(result)
+            print(json.dumps(result), flush=True)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://localhost:8080')
+    parser.add_argument('--openmeteo-url', default='http://localhost:9009',
+                        help='Подменный Open-Meteo для подсчёта обращений; пустая строка - не считать')
+    parser.add_argument('--scenario', nargs='+', choices=SCENARIOS + ['all'], default=['all'])
+    parser.add_argument('--requests', type=int, default=2000, help='Операций на сценарий')
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--forecast-ratio', type=float, default=0.1, help='Доля прогнозов в сценарии mixed')
+    parser.add_argument('--wait', type=float, default=10.0, help='Ожидание результата прогноза, секунды')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--label', default=None, help='Метка прогона в выводе')
+    parser.add_argument('--output', default=None, help='Файл, в который дописываются строки JSON')
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, 'a') as f:
+            for result in results:
+                f.write(json.dumps(result) + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+'''
+Нагрузочный тест /weather на попаданиях в кеш Redis.
+
+Сначала прогревает кеш (по одному запросу на каждую пару город/дата),
+затем выполняет --requests запросов с параллельностью --concurrency
+и печатает throughput и p50/p99 задержки в JSON.
+
+Пример (сервис погоды с локальным Redis на :8080):
+    python benchmarks/weather_cache_hits.py --url http://localhost:8080 --requests 5000 --concurrency 64
+Для сравнения "до/после" запускается против обеих сборок сервиса с одинаковыми параметрами.
+
+Переход на redis.asyncio с ограниченным пулом: один воркер uvicorn, локальный Redis 6.2,
+--requests 10000 --concurrency 64, по 5 прогонов поочерёдно после прогрева, медианы.
+Клиент, сервис и Redis делили одно ядро, разброс между прогонами ~10%.
+                              rps    p50, мс   p99, мс
+    синхронный redis        761.5     80.4     145.1
+    redis.asyncio           784.0     79.0     141.5
+'''
+import argparse
+import asyncio
+import json
+import random
+import time
+from datetime import date, timedelta
+
+import aiohttp
+
+CITIES = [
+    "Moscow", "New-York", "Washington", "London", "Tokyo", "Paris",
+    "Sydney", "Berlin", "Rio-de-Janeiro", "Cape-Town", "Delhi",
+]
+
+
+def percentile(values, q):
+    values = sorted(values)
+    idx = min(len(values) - 1, max(0, round(q / 100 * (len(values) - 1))))
+    return values[idx]
+
+
+async def run(url, n_requests, concurrency, days):
+    end = date.today() - timedelta(days=7)
+    keys = [(city, end - timedelta(days=i)) for city in CITIES for i in range(days)]
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        async def fetch(city, day):
+            params = {'city': city, 'date': day.isoformat()}
+            t0 = time.perf_counter()
+            async with session.get(f'{url}/weather', params=params) as resp:
+                await resp.read()
+                return resp.status, time.perf_counter() - t0
+
+        # Прогрев: все последующие запросы должны попадать в кеш
+        for city, day in keys:
+            await fetch(city, day)
+
+        latencies, errors = [], 0
+        sem = asyncio.Semaphore(concurrency)
+
+        async def worker():
+            nonlocal errors
+            async with sem:
+                status, elapsed = await fetch(*random.choice(keys))
+                if status != 200:
+                    errors += 1
+                latencies.append(elapsed)
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(n_requests)))
+        total = time.perf_counter() - t0
+
+    return {
+        'requests': n_requests,
+        'concurrency': concurrency,
+        'errors': errors,
+        'rps': round(n_requests / total, 1),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://localhost:8080')
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--days', type=int, default=7, help='Количество дат на город в наборе ключей')
+    args = parser.parse_args()
+    result = asyncio.run(run(args.url, args.requests, args.concurrency, args.days))
+    print(json.dumps(result))
+
+
+if __name__ == '__main__':
+    main()
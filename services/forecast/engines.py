@@ -0,0 +1,26 @@
+"""
+Реестр движков прогнозирования воркера. Движок - модуль с общим интерфейсом:
+
+    ENGINE      имя движка: в метаданных прогноза и ключах кеша моделей
+    MODEL       класс модели: predict_many(dates), last_date, to_bytes() / from_bytes()
+    fit_window_models(records, windows, history_days) -> {(start_date, end_date): модель}
+
+Движки с INCREMENTAL = True (predictor_incremental) обучаются по отрезкам матрицы дней
+(history_spans) и статистикам предыдущего окна. Модуль импортируется при первом обращении:
+pandas и scikit-learn нужны только движку 'sklearn'.
+"""
+import importlib
+from types import ModuleType
+
+ENGINE_MODULES = {
+    'sklearn': 'predictor',
+    'numpy': 'predictor_numpy',
+    'incremental': 'predictor_incremental',
+    'climatology': 'predictor_climatology',
+    'seasonal-naive': 'predictor_seasonal',
+    'ridge': 'predictor_ridge',
+}
+
+
+def load_engine(name: str) -> ModuleType:
+    return importlib.import_module(ENGINE_MODULES[name])
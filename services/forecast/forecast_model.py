@@ -0,0 +1,114 @@
+import struct
+import numpy as np
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+
+# Меняется при любом изменении признаков или способа обучения: старые модели в кеше перестают подходить
+MODEL_VERSION = 'linear-v1'
+
+
+@dataclass
+class LinearModel:
+    """
+    Обученная модель, сведённая к одному аффинному отображению признаков в цели
+    (масштабирование признаков и целей уже учтено в коэффициентах).
+    """
+    coef: np.ndarray            # (цели, признаки)
+    intercept: np.ndarray       # (цели,)
+    last_features: np.ndarray   # признаки последнего дня истории
+    last_date: date
+
+    def predict_many(self, predict_dates):
+        feats = np.tile(self.last_features, (len(predict_dates), 1))
+        return forecast_records(predict_dates, feats @ self.coef.T + self.intercept)
+
+    def to_bytes(self) -> bytes:
+        header = struct.pack('<iHH', self.last_date.toordinal(), *self.coef.shape)
+        body = np.concatenate([self.coef.ravel(), self.intercept, self.last_features])
+        return header + body.astype('<f8').tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'LinearModel':
+        ordinal, n_targets, n_features = struct.unpack_from('<iHH', data)
+        body = np.frombuffer(data, dtype='<f8', offset=struct.calcsize('<iHH'))
+        if body.size != n_targets * n_features + n_targets + n_features:
+            raise ValueError('Corrupted model payload')
+        coef_size = n_targets * n_features
+        return cls(
+            coef=body[:coef_size].reshape(n_targets, n_features),
+            intercept=body[coef_size:coef_size + n_targets],
+            last_features=body[coef_size + n_targets:],
+            last_date=date.fromordinal(ordinal)
+        )
+
+
+@dataclass
+class DayOfYearModel:
+    """
+    Модель-таблица: прогноз целей по дню года даты прогноза
+    (климатология, сезонный наивный прогноз).
+    """
+    table: np.ndarray           # (366, цели)
+    last_date: date
+
+    def predict_many(self, predict_dates):
+        rows = [predict_date.timetuple().tm_yday - 1 for predict_date in predict_dates]
+        return forecast_records(predict_dates, self.table[rows])
+
+    def to_bytes(self) -> bytes:
+        header = struct.pack('<iHH', self.last_date.toordinal(), *self.table.shape)
+        return header + self.table.astype('<f8').tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'DayOfYearModel':
+        ordinal, n_rows, n_targets = struct.unpack_from('<iHH', data)
+        body = np.frombuffer(data, dtype='<f8', offset=struct.calcsize('<iHH'))
+        if body.size != n_rows * n_targets:
+            raise ValueError('Corrupted model payload')
+        return cls(table=body.reshape(n_rows, n_targets), last_date=date.fromordinal(ordinal))
+
+
+def forecast_records(predict_dates, preds):
+    """Прогнозы (даты, TARGET_COLS) в записи по датам."""
+    return [
+        {
+            'date': predict_date,
+            'temp_min': float(tmin),
+            'temp_avg': float(tavg),
+            'temp_max': float(tmax)
+        }
+        for predict_date, (tmin, tavg, tmax) in zip(predict_dates, preds)
+    ]
+
+
+FEATURE_COLS = [
+    'temp_min', 'temp_avg', 'temp_max',
+    'humidity_min', 'humidity_avg', 'humidity_max',
+    'precipitation',
+    'dayofyear'
+]
+TARGET_COLS = ['temp_min', 'temp_avg', 'temp_max']
+WEATHER_COLS = [col for col in FEATURE_COLS if col != 'dayofyear']
+
+
+def days_matrix(records, start_date: date, end_date: date) -> np.ndarray:
+    """Матрица (дни интервала, WEATHER_COLS) из записей сервиса погоды; отсутствующие дни и значения - NaN."""
+    values = np.full(((end_date - start_date).days + 1, len(WEATHER_COLS)), np.nan)
+    for record in records:
+        i = (date.fromisoformat(record['date']) - start_date).days
+        if 0 <= i < len(values):
+            values[i] = [np.nan if record[col] is None else record[col] for col in WEATHER_COLS]
+    return values
+
+
+def history_end() -> date:
+    """Последний день, который может попасть в историю: позавчера."""
+    today = datetime.utcnow().date()
+    return today - timedelta(days=2)
+
+
+def training_window(predict_date: date, history_days: int) -> tuple[date, date]:
+    """Окно истории (start_date, end_date) для прогноза на дату."""
+    end_date = min(history_end(), predict_date - timedelta(days=1))
+    start_date = end_date - timedelta(days=history_days - 1)
+    return start_date, end_date
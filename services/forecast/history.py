@@ -0,0 +1,113 @@
+import numpy as np
+from datetime import date, timedelta
+from redis.asyncio import Redis
+
+from forecast_model import days_matrix, history_end
+from history_store import HistoryStore
+from settings import settings
+
+# Формат хранения дневной погоды совпадает с app/utils/daily_store.py сервиса погоды:
+# бинарная строка на город и месяц, на день - float32 [время получения, *WEATHER_FIELDS].
+# Порядок полей тот же, что у WEATHER_COLS модели (forecast_model.days_matrix)
+WEATHER_FIELDS = (
+    'temp_min', 'temp_avg', 'temp_max',
+    'humidity_min', 'humidity_avg', 'humidity_max',
+    'precipitation'
+)
+RECORD_DTYPE = np.dtype('<f4')
+RECORD_FIELDS = 1 + len(WEATHER_FIELDS)
+DECIMALS = 3
+# Ограничение длины интервала /weather/range (WeatherRangeQuery.MAX_DAYS сервиса погоды)
+RANGE_MAX_DAYS = 366
+# Отсутствие дня в архиве считается окончательным, если день старше стольких дней
+SETTLE_DAYS = 14
+
+
+async def fetch_weather_range(session, city, start_date, end_date):
+    """
+    История погоды за интервал: список записей по дням. Интервал длиннее,
+    чем принимает сервис погоды, запрашивается последовательными частями.
+    """
+    url = f"http://{settings.WEATHER_HOST}:{settings.WEATHER_PORT}/weather/range"
+    days = []
+    while start_date <= end_date:
+        chunk_end = min(end_date, start_date + timedelta(days=RANGE_MAX_DAYS - 1))
+        params = {
+            'city': city,
+            'start': start_date.strftime('%Y-%m-%d'),
+            'end': chunk_end.strftime('%Y-%m-%d')
+        }
+        async with session.get(url, params=params) as resp:
+            resp.raise_for_status()
+            resp_json = await resp.json()
+            days.extend(resp_json['days'])
+        start_date = chunk_end + timedelta(days=1)
+    return days
+
+
+class HistoryReader:
+    """
+    Доступ к истории погоды для воркера.
+
+    'redis' - дни читаются одним MGET помесячных строк из кеша сервиса погоды, к HTTP API сервиса
+    воркер обращается только за недостающими днями (сервис сам дозапросит их у
+    Open-Meteo и сохранит в кеш). 'http' - вся история через API сервиса погоды.
+    С локальным кешем на диске (HISTORY_CACHE_DIR) read_days берёт из источника только
+    дни, которых ещё нет в файлах.
+    """
+
+    def __init__(self, redis_client: Redis, session, source: str = settings.HISTORY_SOURCE,
+                 store: HistoryStore | None = None):
+        self.redis = redis_client
+        self.session = session
+        self.source = source
+        self.store = store
+
+    @staticmethod
+    def _month_key(city: str, day: date) -> str:
+        return f'weather:ts:{city}:{day:%Y-%m}'
+
+    async def read(self, city: str, start_date: date, end_date: date) -> list[dict]:
+        if self.source == 'http':
+            return await fetch_weather_range(self.session, city, start_date, end_date)
+
+        days = [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+        keys = list(dict.fromkeys(self._month_key(city, day) for day in days))
+        blocks = {}
+        for key, buf in zip(keys, await self.redis.mget(keys)):
+            if buf:
+                records = np.frombuffer(buf, dtype=RECORD_DTYPE)
+                blocks[key] = records[:len(records) // RECORD_FIELDS * RECORD_FIELDS].reshape(-1, RECORD_FIELDS)
+
+        records = {}
+        for day in days:
+            block = blocks.get(self._month_key(city, day))
+            if block is None or day.day > len(block) or block[day.day - 1, 0] == 0:
+                continue
+            values = block[day.day - 1, 1:].astype(np.float64).round(DECIMALS)
+            records[day] = {'date': day.isoformat(), **dict(zip(WEATHER_FIELDS, values.tolist()))}
+
+        missing = [day for day in days if day not in records]
+        if missing:
+            fetched = await fetch_weather_range(self.session, city, missing[0], missing[-1])
+            for record in fetched:
+                records.setdefault(date.fromisoformat(record['date']), record)
+
+        return [records[day] for day in sorted(records)]
+
+    async def read_days(self, city: str, start_date: date, end_date: date) -> np.ndarray:
+        """История за интервал матрицей (дни, WEATHER_FIELDS), дни без данных - NaN."""
+        if self.store is None:
+            return days_matrix(await self.read(city, start_date, end_date), start_date, end_date)
+
+        values, known = self.store.read(city, start_date, end_date)
+        if not known.all():
+            missing = np.flatnonzero(~known)
+            lo, hi = int(missing[0]), int(missing[-1])
+            fetch_start = start_date + timedelta(days=lo)
+            fetch_end = start_date + timedelta(days=hi)
+            fetched = days_matrix(await self.read(city, fetch_start, fetch_end), fetch_start, fetch_end)
+            self.store.write(city, fetch_start, fetched,
+                             settled_before=history_end() - timedelta(days=SETTLE_DAYS))
+            values[lo:hi + 1] = np.where(known[lo:hi + 1, None], values[lo:hi + 1], fetched)
+        return values.round(DECIMALS)
@@ -0,0 +1,87 @@
+import os
+import numpy as np
+from datetime import date, timedelta
+from pathlib import Path
+
+# Дней в файле года (високосный год), строка на день года
+YEAR_ROWS = 366
+# Состояние дня в файле
+UNKNOWN, PRESENT, ABSENT = 0, 1, -1
+
+
+class HistoryStore:
+    """
+    Локальный кеш дневной истории воркера на диске: файл .npy на город и год, открывается
+    через memmap, поэтому чтение окна в несколько лет - это срезы файлов без разбора записей.
+    Строка на день года - float32 [состояние, *WEATHER_FIELDS]: UNKNOWN - день не загружался,
+    PRESENT - есть данные, ABSENT - источник проверен, данных за день нет.
+    """
+
+    def __init__(self, root: str | Path, n_fields: int):
+        self.root = Path(root)
+        self.n_fields = n_fields
+        self._files: dict[tuple[str, int], np.memmap] = {}
+
+    def _year(self, city: str, year: int, create: bool = False) -> np.memmap | None:
+        if (block := self._files.get((city, year))) is not None:
+            return block
+        path = self.root / city / f'{year}.npy'
+        if not path.exists():
+            if not create:
+                return None
+            # Файл создаётся целиком и подменяется атомарно: соседний воркер не увидит его недописанным
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(f'.{os.getpid()}.tmp')
+            with open(tmp, 'wb') as f:
+                np.save(f, np.zeros((YEAR_ROWS, 1 + self.n_fields), dtype='<f4'))
+            os.replace(tmp, path)
+        block = np.lib.format.open_memmap(path, mode='r+')
+        self._files[(city, year)] = block
+        return block
+
+    @staticmethod
+    def _segments(start_date: date, end_date: date):
+        """Разбивает интервал по годам: (год, строки в файле года, строки в интервале)."""
+        day = start_date
+        while day <= end_date:
+            last = min(end_date, date(day.year, 12, 31))
+            first_row = day.timetuple().tm_yday - 1
+            offset = (day - start_date).days
+            n = (last - day).days + 1
+            yield day.year, slice(first_row, first_row + n), slice(offset, offset + n)
+            day = last + timedelta(days=1)
+
+    def read(self, city: str, start_date: date, end_date: date) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Значения за интервал (дни, поля), NaN для дней без данных,
+        и маска дней, которые уже загружались (есть данные или проверено их отсутствие).
+        """
+        n = (end_date - start_date).days + 1
+        values = np.full((n, self.n_fields), np.nan)
+        state = np.zeros(n, dtype=np.int8)
+        for year, rows, out in self._segments(start_date, end_date):
+            block = self._year(city, year)
+            if block is not None:
+                state[out] = block[rows, 0]
+                values[out] = block[rows, 1:]
+        values[state != PRESENT] = np.nan
+        return values, state != UNKNOWN
+
+    def write(self, city: str, start_date: date, values: np.ndarray, settled_before: date) -> None:
+        """
+        Сохраняет значения за интервал с start_date. Пропуски сохраняются как ABSENT только
+        до settled_before: за последние дни архив может ещё дополниться.
+        """
+        end_date = start_date + timedelta(days=len(values) - 1)
+        present = ~np.isnan(values).any(axis=1)
+        days = np.arange(len(values))
+        state = np.where(present, PRESENT, np.where(days < (settled_before - start_date).days, ABSENT, UNKNOWN))
+        for year, rows, out in self._segments(start_date, end_date):
+            known = state[out] != UNKNOWN
+            if not known.any():
+                continue
+            block = self._year(city, year, create=True)
+            target = np.arange(rows.start, rows.stop)[known]
+            block[target, 0] = state[out][known]
+            block[target, 1:] = np.nan_to_num(values[out][known])
+            block.flush()
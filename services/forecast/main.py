@@ -1,23 +1,45 @@
 import asyncio
 import aio_pika
-import json
+import aiohttp
+import hashlib
+import itertools
+import os
+import random
+import socket
 import time
-from pydantic import BaseModel, Field
-import redis
+from collections import defaultdict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from types import ModuleType
+from pydantic import BaseModel, Field, ValidationError
+from redis.asyncio import Redis
 import uuid
-from typing import Literal
-from datetime import date, datetime
-from predictor import ForecasterLinear
+from typing import Literal, Optional
+from datetime import date, datetime, timedelta, timezone
+from engines import ENGINE_MODULES, load_engine
+from forecast_model import training_window
+from history import WEATHER_FIELDS, HistoryReader
+from history_store import HistoryStore
+from metrics import (FIT_SECONDS, HISTORY_FETCH_SECONDS, JOBS, JOBS_IN_FLIGHT, PARTITIONS_OWNED, PREDICT_SECONDS,
+                     QUEUE_LAG_SECONDS, REDIS_WRITE_SECONDS, ModelCacheCollector)
+from model_cache import ModelCache
+from partitions import Membership, city_partition, dead_queue_name, declare_forecast_queues, owned_partitions
+from prometheus_client import REGISTRY, start_http_server
 from settings import settings
 
 class MQForecastRequest(BaseModel):
     task_id: uuid.UUID
     city: str
     date_: date
+    # Движок, выбранный в запросе; None - FORECAST_ENGINE воркера
+    engine: Optional[Literal[tuple(ENGINE_MODULES)]] = None
+    # Позже этого момента (UTC) задача не выполняется
+    deadline: Optional[datetime] = None
 
 class ForecastMetadata(BaseModel):
-    model: Literal['linear_regression'] = Field(..., description="Использованная модель прогнозирования")
+    model: str = Field(..., description="Использованная модель прогнозирования (движок)")
     predicted_at: datetime = Field(..., description="Время создания прогноза")
+    latency_ms: Optional[float] = Field(None, description="Время обучения и прогноза движком по пачке, мс")
     
 class Forecast(BaseModel):
     temp_min: float
@@ -28,59 +50,469 @@ class ForecastData(BaseModel):
     metadata: ForecastMetadata
     forecast: Forecast
 
-async def process_message(message: aio_pika.IncomingMessage, redis_client: redis.Redis):
-    """Обработка полученного сообщения."""
-    async with message.process():
-        data = json.loads(message.body)
-        request = MQForecastRequest(**data)
-
-        forecaster = ForecasterLinear()
-        await forecaster.fit(request.city, request.date_)
-        time.sleep(3)
-        forecast = forecaster.predict(request.date_)
-
-        fc = ForecastData(
-            metadata=ForecastMetadata(
-                model='linear_regression',
-                predicted_at=datetime.now()
-            ),
-            forecast=Forecast(
-                temp_min=forecast['temp_min'],
-                temp_mean=forecast['temp_avg'],
-                temp_max=forecast['temp_max']
-            )
+PRECOMPUTE_LOCK_KEY = 'precompute:lock'
+# Канал уведомлений о готовых прогнозах: на него подписан сервис погоды (GET /forecast?wait=)
+FORECAST_DONE_CHANNEL = 'forecast:done'
+
+@dataclass
+class WorkerContext:
+    redis_client: Redis
+    channel: aio_pika.abc.AbstractChannel
+    history: HistoryReader
+    executor: Executor
+    model_cache: ModelCache
+    # Движок по умолчанию (FORECAST_ENGINE)
+    engine: ModuleType
+    # Статистики последнего обученного окна по (город, длина окна) для движка 'incremental'
+    window_stats: dict = field(default_factory=dict)
+    # Партиции, которые разбирает воркер; None - одна общая очередь
+    partitions: set[int] | None = None
+
+def generate_task_id(city: str, date_: date, engine: str | None = None) -> uuid.UUID:
+    """Тот же идентификатор, что и ForecastService._generate_task_id в сервисе погоды."""
+    input_str = f"{city}:{date_.isoformat()}" if engine is None else f"{city}:{date_.isoformat()}:{engine}"
+    hash_obj = hashlib.sha256(input_str.encode('utf-8'))
+    return uuid.UUID(bytes=hash_obj.digest()[:16])
+
+def _text(value) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+def delivery_attempts(message: aio_pika.IncomingMessage) -> int:
+    """Сколько раз задача уже отклонялась воркером: по заголовку x-death, который ведёт брокер."""
+    return sum(
+        int(death.get('count', 0))
+        for death in (message.headers or {}).get('x-death') or []
+        if _text(death.get('reason')) == 'rejected'
+    )
+
+async def dead_letter(ctx: WorkerContext, message: aio_pika.IncomingMessage, reason: str):
+    """Перекладывает сообщение в {queue}.dead с причиной в заголовке и подтверждает исходное."""
+    await ctx.channel.default_exchange.publish(
+        aio_pika.Message(
+            body=message.body,
+            headers={'x-error': reason[:1024], 'x-attempts': delivery_attempts(message) + 1},
+            timestamp=message.timestamp,
+            priority=message.priority
+        ),
+        routing_key=dead_queue_name()
+    )
+    await message.ack()
+
+def result_ttl(date_: date) -> int:
+    """Прогноз на дату хранится до конца этой даты и ещё FORECAST_RESULT_GRACE секунд."""
+    expires = datetime.combine(date_ + timedelta(days=1), datetime.min.time())
+    return max(0, int((expires - datetime.now()).total_seconds())) + settings.FORECAST_RESULT_GRACE
+
+def engine_history_days(engine: ModuleType) -> int:
+    return settings.ENGINE_HISTORY_DAYS.get(engine.ENGINE, settings.FORECAST_HISTORY_DAYS)
+
+def forecast_json(forecast: dict, predicted_at: datetime, model: str, latency_ms: float | None = None) -> str:
+    fc = ForecastData(
+        metadata=ForecastMetadata(
+            model=model,
+            predicted_at=predicted_at,
+            latency_ms=latency_ms
+        ),
+        forecast=Forecast(
+            temp_min=forecast['temp_min'],
+            temp_mean=forecast['temp_avg'],
+            temp_max=forecast['temp_max']
         )
-        
-        # Сохраняем результат в Redis
-        redis_client.set(f'forecast:{request.task_id}', fc.model_dump_json())
+    )
+    return fc.model_dump_json()
+
+async def fit_windows(city: str, windows: list, history_days: int, engine: ModuleType,
+                      ctx: WorkerContext) -> tuple[dict, float]:
+    """
+    Обучение моделей по окнам: история загружается один раз на все окна.
+    Возвращает модели и время обучения в секундах.
+    """
+    start_date = min(start for start, _ in windows)
+    end_date = max(end for _, end in windows)
+    with HISTORY_FETCH_SECONDS.time():
+        records = await ctx.history.read(city, start_date, end_date)
+    if not records:
+        raise RuntimeError(f"No weather history for {city} from {start_date} to {end_date}")
+    # Обучение - CPU-bound, выносим из event loop
+    loop = asyncio.get_running_loop()
+    started = time.perf_counter()
+    fitted = await loop.run_in_executor(
+        ctx.executor, engine.fit_window_models, records, windows, history_days
+    )
+    elapsed = time.perf_counter() - started
+    FIT_SECONDS.labels(engine.ENGINE).observe(elapsed)
+    return fitted, elapsed
+
+async def fit_incremental(city: str, windows: list, history_days: int, engine: ModuleType,
+                          ctx: WorkerContext) -> tuple[dict, float]:
+    """
+    Обучение движком с инкрементальным обновлением: статистики предыдущего окна города
+    сдвигаются на новые дни, а не считаются по всему окну заново.
+    """
+    key = (city, history_days)
+    stats = ctx.window_stats.get(key)
+    # Читаются только дни, вошедшие в окно и выпавшие из него с прошлого обучения
+    with HISTORY_FETCH_SECONDS.time():
+        segments = [
+            (lo, await ctx.history.read_days(city, lo, hi))
+            for lo, hi in engine.history_spans(windows, stats)
+        ]
+    loop = asyncio.get_running_loop()
+    started = time.perf_counter()
+    fitted, stats = await loop.run_in_executor(
+        ctx.executor, engine.fit_window_models, segments, windows, history_days, stats
+    )
+    elapsed = time.perf_counter() - started
+    FIT_SECONDS.labels(engine.ENGINE).observe(elapsed)
+    # Храним статистики самого свежего окна: следующие запросы сдвигают их на новые дни
+    previous = ctx.window_stats.get(key)
+    if previous is None or stats.end_date >= previous.end_date:
+        ctx.window_stats[key] = stats
+    return fitted, elapsed
+
+async def forecast_city(city: str, dates: list[date], engine: ModuleType,
+                        ctx: WorkerContext) -> tuple[dict, dict, float]:
+    """
+    Прогнозы по одному городу на набор дат: модели берутся из кеша,
+    для недостающих окон история загружается один раз и обучается по модели на окно.
+    Возвращает прогнозы по датам, использованные модели по окнам
+    и время работы движка (обучение и прогноз) в секундах.
+    """
+    history_days = engine_history_days(engine)
+    window_dates = defaultdict(list)
+    for d in sorted(set(dates)):
+        window_dates[training_window(d, history_days)].append(d)
+
+    models = {}
+    for window in window_dates:
+        if (model := await ctx.model_cache.get(engine, city, window[1], history_days)) is not None:
+            models[window] = model
+
+    engine_seconds = 0.0
+    missing = [window for window in window_dates if window not in models]
+    if missing:
+        fit = fit_incremental if getattr(engine, 'INCREMENTAL', False) else fit_windows
+        fitted, engine_seconds = await fit(city, missing, history_days, engine, ctx)
+        for window, model in fitted.items():
+            await ctx.model_cache.put(engine, city, window[1], history_days, model)
+        models.update(fitted)
+
+    forecasts = {}
+    started = time.perf_counter()
+    for window, window_days in window_dates.items():
+        forecasts.update(zip(window_days, models[window].predict_many(window_days)))
+    elapsed = time.perf_counter() - started
+    PREDICT_SECONDS.labels(engine.ENGINE).observe(elapsed)
+    return forecasts, models, engine_seconds + elapsed
+
+def status_key(task_id) -> str:
+    return f'forecast:status:{task_id}'
+
+async def set_status(ctx: WorkerContext, requests: list[MQForecastRequest], task_status: str):
+    async with ctx.redis_client.pipeline(transaction=False) as pipe:
+        for request in requests:
+            pipe.set(status_key(request.task_id), task_status, ex=settings.FORECAST_STATUS_TTL)
+        if task_status in ('failed', 'expired'):
+            # Ожидающие клиенты должны узнать и о неудаче
+            for request in requests:
+                pipe.publish(FORECAST_DONE_CHANNEL, str(request.task_id))
+        await pipe.execute()
+
+async def process_city_batch(city: str, engine: ModuleType,
+                             batch: list[tuple[aio_pika.IncomingMessage, MQForecastRequest]],
+                             ctx: WorkerContext):
+    """
+    Обработка пачки запросов по одному городу и движку. Задачи, результат которых уже есть,
+    и задачи с истёкшим сроком отбрасываются без расчёта.
+    """
+    # Сообщения, ещё не подтверждённые и не отклонённые: при ошибке они уходят на повтор
+    unsettled = list(batch)
+    JOBS_IN_FLIGHT.inc(len(batch))
+    try:
+        async with ctx.redis_client.pipeline(transaction=False) as pipe:
+            for _, request in batch:
+                pipe.get(status_key(request.task_id))
+                pipe.exists(f'forecast:{request.task_id}')
+            replies = await pipe.execute()
+
+        now = datetime.now(timezone.utc)
+        skipped, expired, pending = [], [], []
+        for (message, request), task_status, has_result in zip(batch, replies[::2], replies[1::2]):
+            if task_status == b'done' or has_result:
+                skipped.append((message, request))
+            elif request.deadline is not None and request.deadline < now:
+                expired.append((message, request))
+            else:
+                pending.append((message, request))
+        if expired:
+            await set_status(ctx, [request for _, request in expired], 'expired')
+        for outcome, dropped in (('skipped', skipped), ('expired', expired)):
+            for message, request in dropped:
+                await message.ack()
+                unsettled.remove((message, request))
+            JOBS.labels(outcome).inc(len(dropped))
+        if not pending:
+            return
+        requests = [request for _, request in pending]
+
+        await set_status(ctx, requests, 'running')
+        forecasts, _, engine_seconds = await forecast_city(
+            city, [request.date_ for request in requests], engine, ctx
+        )
+
+        predicted_at = datetime.now()
+        latency_ms = round(engine_seconds * 1000, 3)
+        async with ctx.redis_client.pipeline(transaction=False) as pipe:
+            for request in requests:
+                # Сохраняем результат в Redis
+                forecast = forecast_json(forecasts[request.date_], predicted_at, engine.ENGINE, latency_ms)
+                pipe.set(f'forecast:{request.task_id}', forecast, ex=result_ttl(request.date_))
+                pipe.set(status_key(request.task_id), 'done', ex=settings.FORECAST_STATUS_TTL)
+            for request in requests:
+                pipe.publish(FORECAST_DONE_CHANNEL, str(request.task_id))
+            with REDIS_WRITE_SECONDS.time():
+                await pipe.execute()
+    except Exception as e:
+        print(f'Failed to process {len(unsettled)} forecast(s) for {city}: {e!r}')
+        JOBS.labels('failed').inc(len(unsettled))
+        # Задача возвращается в очередь через {queue}.retry, пока не исчерпает повторы
+        retry = [(message, request) for message, request in unsettled
+                 if delivery_attempts(message) < settings.WORKER_MAX_RETRIES]
+        final = [(message, request) for message, request in unsettled
+                 if delivery_attempts(message) >= settings.WORKER_MAX_RETRIES]
+        try:
+            if retry:
+                await set_status(ctx, [request for _, request in retry], 'queued')
+            if final:
+                await set_status(ctx, [request for _, request in final], 'failed')
+        except Exception as status_error:
+            print(f'Failed to update forecast statuses: {status_error!r}')
+        for message, _ in retry:
+            await message.reject()
+        for message, _ in final:
+            await dead_letter(ctx, message, repr(e))
+        return
+    finally:
+        JOBS_IN_FLIGHT.dec(len(batch))
+
+    JOBS.labels('done').inc(len(pending))
+
+    for message, request in pending:
+        await message.ack()
         print(f'Stored forecast for {request.task_id}: {request.city} on {request.date_}')
 
+async def precompute_city(city: str, ctx: WorkerContext) -> bool:
+    """
+    Пересчитывает прогнозы города на PRECOMPUTE_DAYS_AHEAD дней начиная с сегодняшнего.
+    Сетка пересчитывается, только если сменился день или окна обучения сдвинулись на новые дни истории.
+    """
+    today = date.today()
+    dates = [today + timedelta(days=i) for i in range(settings.PRECOMPUTE_DAYS_AHEAD)]
+
+    # Версия сетки: первый день и конец последнего окна обучения - по нему же кешируются модели,
+    # поэтому версия известна до расчёта и уже посчитанная сетка не пересчитывается
+    marker_key = f'precompute:{city}'
+    last_window_end = max(training_window(d, engine_history_days(ctx.engine))[1] for d in dates)
+    version = f'{today.isoformat()}:{last_window_end.isoformat()}'
+    if (await ctx.redis_client.get(marker_key)) == version.encode():
+        return False
+
+    forecasts, _, engine_seconds = await forecast_city(city, dates, ctx.engine, ctx)
+
+    predicted_at = datetime.now()
+    latency_ms = round(engine_seconds * 1000, 3)
+    async with ctx.redis_client.pipeline(transaction=False) as pipe:
+        for d, forecast in forecasts.items():
+            task_id = generate_task_id(city, d)
+            pipe.set(f'forecast:{task_id}', forecast_json(forecast, predicted_at, ctx.engine.ENGINE, latency_ms),
+                     ex=result_ttl(d))
+            pipe.set(status_key(task_id), 'done', ex=settings.FORECAST_STATUS_TTL)
+            pipe.publish(FORECAST_DONE_CHANNEL, str(task_id))
+        pipe.set(marker_key, version, ex=60 * 60 * 24 * 2)
+        await pipe.execute()
+    return True
+
+async def precompute_forever(ctx: WorkerContext):
+    """
+    Периодический предрасчёт сетки прогнозов. С партициями каждый воркер считает города
+    своих партиций (их модели и так в его кеше), с одной общей очередью за интервал
+    все города считает один воркер.
+    """
+    while True:
+        token = uuid.uuid4().hex
+        try:
+            partitioned = ctx.partitions is not None
+            if partitioned or await ctx.redis_client.set(PRECOMPUTE_LOCK_KEY, token, nx=True,
+                                                         ex=settings.PRECOMPUTE_INTERVAL):
+                cities = [city for city in settings.PRECOMPUTE_CITIES
+                          if not partitioned or city_partition(city) in ctx.partitions]
+                updated = 0
+                for city in cities:
+                    try:
+                        updated += await precompute_city(city, ctx)
+                    except Exception as e:
+                        print(f'Precompute failed for {city}: {e!r}')
+                if updated:
+                    print(f'Precomputed forecasts for {updated} city(ies)')
+        except Exception as e:
+            print(f'Precompute run failed: {e!r}')
+        await asyncio.sleep(settings.PRECOMPUTE_INTERVAL * random.uniform(1, 1.1))
+
+async def rebalance(queues: list, on_message, membership: Membership, consumers: dict, ctx: WorkerContext):
+    """
+    Сердцебиение воркера и перераспределение партиций: при появлении или уходе воркеров
+    потребление чужих партиций прекращается (уже полученные сообщения дорабатываются),
+    а доставшиеся партиции начинают разбираться. consumers - партиция -> тег потребителя.
+    """
+    workers = await membership.heartbeat()
+    owned = owned_partitions(membership.worker_id, workers, len(queues))
+    for partition in sorted(set(consumers) - owned):
+        await queues[partition].cancel(consumers.pop(partition))
+    for partition in sorted(owned - set(consumers)):
+        consumers[partition] = await queues[partition].consume(on_message)
+    if owned != ctx.partitions:
+        print(f'Worker {membership.worker_id} of {len(workers)} owns partitions {sorted(owned)}')
+    ctx.partitions = owned
+    PARTITIONS_OWNED.set(len(owned))
+
+async def rebalance_forever(queues: list, on_message, membership: Membership, consumers: dict, ctx: WorkerContext):
+    try:
+        while True:
+            await asyncio.sleep(settings.WORKER_HEARTBEAT_INTERVAL)
+            try:
+                await rebalance(queues, on_message, membership, consumers, ctx)
+            except Exception as e:
+                print(f'Rebalance failed: {e!r}')
+    finally:
+        await membership.leave()
+
+async def collect_batch(inbox: asyncio.PriorityQueue) -> list[aio_pika.IncomingMessage]:
+    """
+    Ожидает первое сообщение и добирает к нему пришедшие в течение окна пакетирования.
+    Из полученных, но ещё не обработанных сообщений первыми берутся старшие по приоритету.
+    """
+    batch = [(await inbox.get())[-1]]
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.WORKER_BATCH_WINDOW
+    while len(batch) < settings.WORKER_BATCH_SIZE:
+        timeout = deadline - loop.time()
+        if timeout <= 0:
+            break
+        try:
+            batch.append((await asyncio.wait_for(inbox.get(), timeout))[-1])
+        except asyncio.TimeoutError:
+            break
+    return batch
+
+async def dispatch_batches(inbox: asyncio.PriorityQueue, ctx: WorkerContext):
+    """Раскладывает микропакеты по городам и движкам и обрабатывает группы с ограниченной параллельностью."""
+    semaphore = asyncio.Semaphore(settings.WORKER_CONCURRENCY)
+    running = set()
+    while True:
+        by_group = defaultdict(list)
+        messages = await collect_batch(inbox)
+        timestamps = [message.timestamp.timestamp() for message in messages if message.timestamp is not None]
+        if timestamps:
+            QUEUE_LAG_SECONDS.set(max(0.0, time.time() - min(timestamps)))
+        for message in messages:
+            try:
+                request = MQForecastRequest.model_validate_json(message.body)
+            except ValidationError as e:
+                print(f'Rejected malformed message: {e!r}')
+                try:
+                    await dead_letter(ctx, message, f'malformed: {e!r}')
+                except Exception as dead_error:
+                    # Очередь .dead недоступна: возвращаем сообщение, не останавливая разбор остальных
+                    print(f'Failed to dead-letter malformed message: {dead_error!r}')
+                    try:
+                        await message.reject(requeue=True)
+                    except Exception as reject_error:
+                        print(f'Failed to requeue malformed message: {reject_error!r}')
+                continue
+            by_group[(request.city, request.engine or settings.FORECAST_ENGINE)].append((message, request))
+
+        for (city, engine_name), batch in by_group.items():
+            await semaphore.acquire()
+            task = asyncio.create_task(process_city_batch(city, load_engine(engine_name), batch, ctx))
+            running.add(task)
+            task.add_done_callback(running.discard)
+            task.add_done_callback(lambda _: semaphore.release())
+
+def create_executor() -> Executor:
+    pool_size = settings.WORKER_POOL_SIZE or os.cpu_count()
+    if settings.WORKER_EXECUTOR == 'thread':
+        return ThreadPoolExecutor(max_workers=pool_size)
+    return ProcessPoolExecutor(max_workers=pool_size)
+
 async def main():
     # Устанавливаем соединение с RabbitMQ
     rabbit_connection = await aio_pika.connect_robust(
         settings.RABBIT_URL
     )
 
-    async with rabbit_connection:
+    # Создаем клиент Redis
+    redis_client = Redis(
+        host=settings.REDIS_HOST,
+        port=settings.REDIS_PORT
+    )
+
+    async with rabbit_connection, aiohttp.ClientSession() as session, redis_client:
         channel = await rabbit_connection.channel()
-        
-        # Создаем клиент Redis
-        redis_client = redis.Redis(
-            host=settings.REDIS_HOST,
-            port=settings.REDIS_PORT
-        )
+        # Брокер отдаёт столько сообщений, сколько нужно для заполнения всех пачек,
+        # лимит общий на канал, а не на каждую разбираемую партицию
+        await channel.set_qos(prefetch_count=settings.WORKER_CONCURRENCY * settings.WORKER_BATCH_SIZE,
+                              global_=settings.RABBITMQ_PARTITIONS > 1)
 
-        # Объявляем очередь
-        queue = await channel.declare_queue(
-            settings.RABBITMQ_FC_REQ_QUEUE,
-            durable=True
-        )
+        # Объявляем очереди
+        queues = await declare_forecast_queues(channel)
+
+        inbox = asyncio.PriorityQueue()
+        arrivals = itertools.count()
+
+        async def on_message(message: aio_pika.IncomingMessage):
+            # Старшие приоритеты первыми, внутри приоритета - по порядку поступления
+            inbox.put_nowait((-(message.priority or 0), next(arrivals), message))
 
-        print("Waiting for messages...")
-        
-        # Начинаем потребление сообщений
-        await queue.consume(lambda msg: process_message(msg, redis_client))
+        engine = load_engine(settings.FORECAST_ENGINE)
+        store = HistoryStore(settings.HISTORY_CACHE_DIR, len(WEATHER_FIELDS)) if settings.HISTORY_CACHE_DIR else None
+
+        with create_executor() as executor:
+            print(f"Waiting for messages (engine {engine.ENGINE}, concurrency {settings.WORKER_CONCURRENCY}, "
+                  f"batch {settings.WORKER_BATCH_SIZE})...")
+
+            ctx = WorkerContext(
+                redis_client=redis_client,
+                channel=channel,
+                history=HistoryReader(redis_client, session, store=store),
+                executor=executor,
+                model_cache=ModelCache(redis_client),
+                engine=engine
+            )
+            # Фоновые задачи воркера: отменяются при остановке, пока соединения ещё открыты
+            background = []
+            # Начинаем потребление сообщений: они копятся во входящей очереди до сборки пачки.
+            # С партициями очереди разбираются по назначению, которое пересчитывается по сердцебиениям
+            if settings.RABBITMQ_PARTITIONS == 1:
+                await queues[0].consume(on_message)
+            else:
+                worker_id = f'{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}'
+                membership = Membership(redis_client, worker_id)
+                consumers = {}
+                await rebalance(queues, on_message, membership, consumers, ctx)
+                # При отмене задача удаляет воркер из списка живых, и его партиции сразу переходят другим
+                background.append(asyncio.create_task(rebalance_forever(queues, on_message, membership, consumers, ctx)))
 
-        await asyncio.Future()  # Бесконечное ожидание
+            if settings.METRICS_PORT:
+                REGISTRY.register(ModelCacheCollector(ctx.model_cache))
+                start_http_server(settings.METRICS_PORT)
+            if settings.PRECOMPUTE_ENABLED:
+                background.append(asyncio.create_task(precompute_forever(ctx)))
+            try:
+                await dispatch_batches(inbox, ctx)
+            finally:
+                for task in background:
+                    task.cancel()
+                await asyncio.gather(*background, return_exceptions=True)
 
-asyncio.run(main())
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,37 @@
+from prometheus_client import Counter, Gauge, Histogram
+from prometheus_client.core import CounterMetricFamily
+from prometheus_client.registry import Collector
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+HISTORY_FETCH_SECONDS = Histogram(
+    'forecast_history_fetch_seconds', 'Загрузка истории погоды для обучения', buckets=LATENCY_BUCKETS
+)
+FIT_SECONDS = Histogram(
+    'forecast_fit_seconds', 'Обучение моделей по окнам одного города (включая передачу в пул)',
+    ['engine'], buckets=LATENCY_BUCKETS
+)
+PREDICT_SECONDS = Histogram(
+    'forecast_predict_seconds', 'Расчёт прогнозов по готовым моделям', ['engine'], buckets=LATENCY_BUCKETS
+)
+REDIS_WRITE_SECONDS = Histogram(
+    'forecast_redis_write_seconds', 'Запись результатов и статусов в Redis', buckets=LATENCY_BUCKETS
+)
+JOBS = Counter('forecast_jobs_total', 'Обработанные задачи прогноза', ['result'])
+JOBS_IN_FLIGHT = Gauge('forecast_jobs_in_flight', 'Задачи прогноза в обработке')
+PARTITIONS_OWNED = Gauge('forecast_partitions_owned', 'Партиции очереди прогнозов, которые разбирает воркер')
+QUEUE_LAG_SECONDS = Gauge(
+    'forecast_queue_lag_seconds', 'Время ожидания в очереди самого старого сообщения последней пачки'
+)
+
+class ModelCacheCollector(Collector):
+    '''Счётчики кеша моделей в формате Prometheus'''
+
+    def __init__(self, model_cache):
+        self.model_cache = model_cache
+
+    def collect(self):
+        lookups = CounterMetricFamily('forecast_model_cache_lookups', 'Поиск моделей в кеше', labels=['result'])
+        for result, value in self.model_cache.counters.items():
+            lookups.add_metric([result], value)
+        yield lookups
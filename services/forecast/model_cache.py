@@ -0,0 +1,62 @@
+from collections import Counter, OrderedDict
+from datetime import date
+from types import ModuleType
+from redis.asyncio import Redis
+
+from forecast_model import MODEL_VERSION, history_end
+from settings import settings
+
+
+class ModelCache:
+    """
+    Кеш обученных моделей: LRU в памяти процесса и общий для воркеров уровень в Redis.
+    Ключ - окно обучения (город, последний день истории, длина окна), движок и версия модели.
+    """
+
+    def __init__(self, redis_client: Redis, max_items: int = settings.MODEL_CACHE_SIZE):
+        self.redis = redis_client
+        self.max_items = max_items
+        self._local: OrderedDict[str, object] = OrderedDict()
+        # (движок, город, длина окна) -> конец текущего «живого» окна (заканчивается позавчера)
+        self._live: dict[tuple[str, str, int], date] = {}
+        self.counters = Counter(local_hits=0, redis_hits=0, misses=0)
+
+    @staticmethod
+    def _key(engine: str, city: str, end_date: date, history_days: int) -> str:
+        return f'model:{MODEL_VERSION}:{engine}:{city}:{history_days}:{end_date.isoformat()}'
+
+    async def get(self, engine: ModuleType, city: str, end_date: date, history_days: int):
+        key = self._key(engine.ENGINE, city, end_date, history_days)
+        if (model := self._local.get(key)) is not None:
+            self._local.move_to_end(key)
+            self.counters['local_hits'] += 1
+            return model
+
+        data = await self.redis.get(key)
+        if data is None:
+            self.counters['misses'] += 1
+            return None
+        model = engine.MODEL.from_bytes(data)
+        self._put_local(engine.ENGINE, city, end_date, history_days, model)
+        self.counters['redis_hits'] += 1
+        return model
+
+    async def put(self, engine: ModuleType, city: str, end_date: date, history_days: int, model) -> None:
+        self._put_local(engine.ENGINE, city, end_date, history_days, model)
+        # Если в истории ещё нет последних дней окна, модель скоро устареет
+        ttl = settings.MODEL_CACHE_TTL if model.last_date >= end_date else settings.MODEL_CACHE_INCOMPLETE_TTL
+        await self.redis.set(self._key(engine.ENGINE, city, end_date, history_days), model.to_bytes(), ex=ttl)
+
+    def _put_local(self, engine: str, city: str, end_date: date, history_days: int, model) -> None:
+        if end_date == history_end():
+            previous = self._live.get((engine, city, history_days))
+            self._live[(engine, city, history_days)] = end_date
+            if previous is not None and previous != end_date:
+                # Окно истории сдвинулось: модель по прежнему живому окну больше не запрашивается
+                self._local.pop(self._key(engine, city, previous, history_days), None)
+
+        key = self._key(engine, city, end_date, history_days)
+        self._local[key] = model
+        self._local.move_to_end(key)
+        while len(self._local) > self.max_items:
+            self._local.popitem(last=False)
@@ -0,0 +1,91 @@
+import hashlib
+import time
+import aio_pika
+from redis.asyncio import Redis
+
+from settings import settings
+
+# Живые воркеры: сортированное множество id воркера -> время последнего сердцебиения
+WORKERS_KEY = 'forecast:workers'
+
+
+def partition_queue_name(partition: int, queue: str = settings.RABBITMQ_FC_REQ_QUEUE) -> str:
+    """Очередь партиции; при одной партиции - сама RABBITMQ_FC_REQ_QUEUE."""
+    return queue if settings.RABBITMQ_PARTITIONS == 1 else f'{queue}.p{partition}'
+
+
+def city_partition(city: str) -> int:
+    """Партиция города: тот же устойчивый хеш, что в сервисе погоды (app/connections/rabbitmq.py)."""
+    digest = hashlib.sha256(city.encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') % settings.RABBITMQ_PARTITIONS
+
+
+def retry_queue_name(queue: str) -> str:
+    return f'{queue}.retry'
+
+
+def dead_queue_name(queue: str = settings.RABBITMQ_FC_REQ_QUEUE) -> str:
+    return f'{queue}.dead'
+
+
+async def declare_forecast_queues(channel: aio_pika.abc.AbstractChannel) -> list[aio_pika.abc.AbstractQueue]:
+    """
+    Очереди прогнозов (так же их объявляет сервис погоды): по очереди с приоритетами
+    на партицию, отклонённые задачи уходят в {очередь}.retry и через RABBITMQ_RETRY_DELAY
+    возвращаются обратно; общая {RABBITMQ_FC_REQ_QUEUE}.dead - задачи, исчерпавшие
+    повторы, и нераспознанные сообщения.
+    """
+    await channel.declare_queue(dead_queue_name(), durable=True)
+    queues = []
+    for partition in range(settings.RABBITMQ_PARTITIONS):
+        queue = partition_queue_name(partition)
+        await channel.declare_queue(retry_queue_name(queue), durable=True, arguments={
+            'x-message-ttl': settings.RABBITMQ_RETRY_DELAY * 1000,
+            'x-dead-letter-exchange': '',
+            'x-dead-letter-routing-key': queue,
+        })
+        queues.append(await channel.declare_queue(queue, durable=True, arguments={
+            'x-max-priority': settings.RABBITMQ_MAX_PRIORITY,
+            'x-dead-letter-exchange': '',
+            'x-dead-letter-routing-key': retry_queue_name(queue),
+        }))
+    return queues
+
+
+def _weight(worker_id: str, partition: int) -> int:
+    return int.from_bytes(hashlib.sha256(f'{worker_id}:{partition}'.encode('utf-8')).digest()[:8], 'big')
+
+
+def owned_partitions(worker_id: str, workers: list[str], partitions: int = settings.RABBITMQ_PARTITIONS) -> set[int]:
+    """
+    Партиции воркера по rendezvous-хешированию: партиция достаётся живому воркеру
+    с наибольшим весом. При уходе или появлении воркера переезжают только его партиции.
+    """
+    return {
+        partition for partition in range(partitions)
+        if max(workers, key=lambda worker: _weight(worker, partition)) == worker_id
+    }
+
+
+class Membership:
+    """
+    Сердцебиение воркера в Redis и список живых воркеров: воркер считается живым,
+    пока его последнее сердцебиение не старше WORKER_HEARTBEAT_TTL.
+    """
+
+    def __init__(self, redis_client: Redis, worker_id: str, ttl: float = settings.WORKER_HEARTBEAT_TTL):
+        self.redis = redis_client
+        self.worker_id = worker_id
+        self.ttl = ttl
+
+    async def heartbeat(self) -> list[str]:
+        now = time.time()
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.zadd(WORKERS_KEY, {self.worker_id: now})
+            pipe.zremrangebyscore(WORKERS_KEY, '-inf', now - self.ttl)
+            pipe.zrange(WORKERS_KEY, 0, -1)
+            *_, workers = await pipe.execute()
+        return sorted(worker.decode() for worker in workers)
+
+    async def leave(self) -> None:
+        await self.redis.zrem(WORKERS_KEY, self.worker_id)
@@ -1,13 +1,15 @@
 import aiohttp
-import asyncio
+import numpy as np
 import pandas as pd
-from datetime import datetime, timedelta
 from sklearn.linear_model import LinearRegression
 from sklearn.multioutput import MultiOutputRegressor
 from sklearn.preprocessing import StandardScaler
 
-from settings import settings
+from forecast_model import LinearModel, FEATURE_COLS, TARGET_COLS, training_window
+from history import fetch_weather_range
 
+ENGINE = 'sklearn'
+MODEL = LinearModel
 
 class ForecasterLinear:
     def __init__(self, history_days=7):
@@ -15,31 +17,19 @@ class ForecasterLinear:
         self.model = None
         self.scaler_X = StandardScaler()
         self.scaler_y = StandardScaler()
-        self.feature_cols = [
-            'temp_min', 'temp_avg', 'temp_max',
-            'humidity_min', 'humidity_avg', 'humidity_max',
-            'precipitation',
-            'dayofyear'
-        ]
-        self.target_cols = ['temp_min', 'temp_avg', 'temp_max']
+        self.feature_cols = FEATURE_COLS
+        self.target_cols = TARGET_COLS
         self.df_history = None
 
-    async def fetch_day_weather(self, session, city, date):
-        url = f"http://{settings.WEATHER_HOST}:{settings.WEATHER_PORT}/weather?city={city}&date={date.strftime('%Y-%m-%d')}"
-        async with session.get(url) as resp:
-            resp_json = await resp.json()
-            data = resp_json['weather']
-            data['date'] = date.strftime('%Y-%m-%d')
-            return data
+    async def fetch_weather_range(self, session, city, start_date, end_date):
+        return await fetch_weather_range(session, city, start_date, end_date)
 
     async def get_weather_history(self, session, city, start_date, end_date):
-        days = pd.date_range(start=start_date, end=end_date)
-        tasks = [self.fetch_day_weather(session, city, day) for day in days]
-        results = await asyncio.gather(*tasks)
-        df = pd.DataFrame(results)
-        df['date'] = pd.to_datetime(df['date'])
-        df['dayofyear'] = df['date'].dt.dayofyear
-        return df
+        # Весь интервал одним запросом: сервис погоды добирает недостающие дни у API разом
+        results = await self.fetch_weather_range(session, city, start_date, end_date)
+        if not results:
+            raise RuntimeError(f"No weather history for {city} from {start_date} to {end_date}")
+        return history_frame(results)
 
     def make_supervised(self, df):
         df = df.copy()
@@ -52,37 +42,86 @@ class ForecasterLinear:
         y = df[['temp_min_tgt', 'temp_avg_tgt', 'temp_max_tgt']]
         return X, y
 
-    async def fit(self, city, predict_date):
-        today = datetime.utcnow().date()
-        max_history_date = today - timedelta(days=2)
-        dt_predict = pd.to_datetime(predict_date).date()
-        end_date = min(max_history_date, dt_predict - timedelta(days=1))
-        start_date = end_date - timedelta(days=self.history_days - 1)
+    def training_window(self, predict_date):
+        return training_window(pd.to_datetime(predict_date).date(), self.history_days)
+
+    async def load_history(self, session, city, predict_date):
+        start_date, end_date = self.training_window(predict_date)
+        df = await self.get_weather_history(session, city, start_date, end_date)
+        return df.dropna().reset_index(drop=True)
 
+    def fit_history(self, df):
+        """Обучение на загруженной истории. CPU-bound, не требует event loop."""
+        self.df_history = df
+        X, y = self.make_supervised(df)
+        X_scaled = self.scaler_X.fit_transform(X)
+        y_scaled = self.scaler_y.fit_transform(y)
+        self.model = MultiOutputRegressor(LinearRegression())
+        self.model.fit(X_scaled, y_scaled)
+
+    async def fit(self, city, predict_date):
         async with aiohttp.ClientSession() as session:
-            df = await self.get_weather_history(session, city, start_date, end_date)
-            df = df.dropna().reset_index(drop=True)
-            self.df_history = df
-            X, y = self.make_supervised(df)
-            X_scaled = self.scaler_X.fit_transform(X)
-            y_scaled = self.scaler_y.fit_transform(y)
-            self.model = MultiOutputRegressor(LinearRegression())
-            self.model.fit(X_scaled, y_scaled)
+            df = await self.load_history(session, city, predict_date)
+        self.fit_history(df)
+
+    def export_model(self) -> LinearModel:
+        """Сводит масштабирование и регрессию к одной аффинной модели для кеширования."""
+        if self.model is None or self.df_history is None:
+            raise RuntimeError("Model is not trained. Call 'fit' first.")
+        W = np.vstack([est.coef_ for est in self.model.estimators_])
+        b = np.array([est.intercept_ for est in self.model.estimators_])
+        mx, sx = self.scaler_X.mean_, self.scaler_X.scale_
+        my, sy = self.scaler_y.mean_, self.scaler_y.scale_
+        last_row = self.df_history.iloc[-1]
+        return LinearModel(
+            coef=sy[:, None] * W / sx[None, :],
+            intercept=sy * (b - W @ (mx / sx)) + my,
+            last_features=last_row[self.feature_cols].to_numpy(dtype=np.float64),
+            last_date=last_row['date'].date()
+        )
 
     def predict(self, predict_date):
+        return self.predict_many([predict_date])[0]
+
+    def predict_many(self, predict_dates):
+        """Прогноз на несколько дат одной моделью за один вызов predict."""
         if self.model is None or self.df_history is None:
             raise RuntimeError("Model is not trained. Call 'fit' first.")
         # Для прогноза берём последнюю доступную строку (вчера)
         last_row = self.df_history.iloc[[-1]]
-        feats = last_row[self.feature_cols].values
+        feats = last_row[self.feature_cols].values.repeat(len(predict_dates), axis=0)
         feats_scaled = self.scaler_X.transform(feats)
         preds_scaled = self.model.predict(feats_scaled)
         preds = self.scaler_y.inverse_transform(preds_scaled)
-        tmin, tavg, tmax = preds[0]
-        forecast = {
-            'date': predict_date,
-            'temp_min': float(tmin),
-            'temp_avg': float(tavg),
-            'temp_max': float(tmax)
-        }
-        return forecast
\ No newline at end of file
+        return [
+            {
+                'date': predict_date,
+                'temp_min': float(tmin),
+                'temp_avg': float(tavg),
+                'temp_max': float(tmax)
+            }
+            for predict_date, (tmin, tavg, tmax) in zip(predict_dates, preds)
+        ]
+
+
+def history_frame(records):
+    """DataFrame истории из записей сервиса погоды."""
+    df = pd.DataFrame(records)
+    df['date'] = pd.to_datetime(df['date'])
+    df['dayofyear'] = df['date'].dt.dayofyear
+    return df
+
+
+def fit_window_models(records, windows, history_days=7):
+    """
+    Обучает по модели на каждое окно (start_date, end_date) по истории одного города,
+    покрывающей все окна. Выполняется в пуле процессов/потоков воркера.
+    """
+    df = history_frame(records).dropna().reset_index(drop=True)
+    models = {}
+    for start_date, end_date in windows:
+        mask = (df['date'] >= pd.Timestamp(start_date)) & (df['date'] <= pd.Timestamp(end_date))
+        forecaster = ForecasterLinear(history_days=history_days)
+        forecaster.fit_history(df[mask].reset_index(drop=True))
+        models[(start_date, end_date)] = forecaster.export_model()
+    return models
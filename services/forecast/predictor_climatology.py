@@ -0,0 +1,65 @@
+"""
+Климатология: прогноз на дату - среднее значение целей в этот день года по всей
+истории окна, сглаженное по соседним дням года. Не зависит от последних дней и почти
+ничего не стоит при обучении, но нужна история в несколько лет (ENGINE_HISTORY_DAYS).
+"""
+import numpy as np
+from datetime import date, timedelta
+
+from forecast_model import DayOfYearModel, WEATHER_COLS, TARGET_COLS, days_matrix
+
+ENGINE = 'climatology'
+MODEL = DayOfYearModel
+
+TARGET_IDX = [WEATHER_COLS.index(col) for col in TARGET_COLS]
+# Сглаживание: дни года в пределах ±HALF_WIDTH (по кругу)
+HALF_WIDTH = 7
+YEAR_ROWS = 366
+
+
+def dayofyear(first: date, n: int) -> np.ndarray:
+    """Номера дней года (с 1) для n дней начиная с first."""
+    days = np.datetime64(first.isoformat(), 'D') + np.arange(n)
+    return (days - days.astype('datetime64[Y]')).astype(np.int64) + 1
+
+
+def fill_table(table: np.ndarray) -> np.ndarray:
+    """Дни года без данных заполняются значением ближайшего предыдущего дня (по кругу)."""
+    present = np.flatnonzero(~np.isnan(table).any(axis=1))
+    if not len(present):
+        raise RuntimeError('No history for day-of-year table')
+    # Для каждой строки - индекс последней заполненной строки не позже неё, до первой - последняя в году
+    idx = np.searchsorted(present, np.arange(len(table)), side='right') - 1
+    return table[present[idx]]
+
+
+def climatology_table(doy: np.ndarray, targets: np.ndarray) -> np.ndarray:
+    keep = ~np.isnan(targets).any(axis=1)
+    sums = np.zeros((YEAR_ROWS, targets.shape[1]))
+    counts = np.zeros(YEAR_ROWS)
+    np.add.at(sums, doy[keep] - 1, targets[keep])
+    np.add.at(counts, doy[keep] - 1, 1)
+    offsets = range(-HALF_WIDTH, HALF_WIDTH + 1)
+    sums = sum(np.roll(sums, k, axis=0) for k in offsets)
+    counts = sum(np.roll(counts, k) for k in offsets)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return sums / counts[:, None]
+
+
+def fit_window_models(records, windows, history_days=None):
+    """Таблица средних по дням года на каждое окно (start_date, end_date) истории одного города."""
+    first = min(start for start, _ in windows)
+    values = days_matrix(records, first, max(end for _, end in windows))[:, TARGET_IDX]
+    doy = dayofyear(first, len(values))
+
+    models = {}
+    for start_date, end_date in windows:
+        rows = slice((start_date - first).days, (end_date - first).days + 1)
+        present = np.flatnonzero(~np.isnan(values[rows]).any(axis=1))
+        if not len(present):
+            raise RuntimeError(f"Not enough history from {start_date} to {end_date}")
+        models[(start_date, end_date)] = DayOfYearModel(
+            table=fill_table(climatology_table(doy[rows], values[rows])),
+            last_date=start_date + timedelta(days=int(present[-1]))
+        )
+    return models
@@ -0,0 +1,179 @@
+"""
+Линейная модель на длинном окне истории (годы) с инкрементальным обновлением.
+Признаки и цели те же, что у ForecasterLinear, но вместо обучения по строкам окна
+хранятся достаточные статистики - суммы попарных произведений [1, X, y] по парам
+соседних дней окна (XᵀX и Xᵀy вместе со средними). Когда окно сдвигается на новые дни,
+в суммы добавляются пары новых дней и вычитаются пары выпавших: стоимость обновления
+зависит от сдвига, а не от длины окна. Решение - то же стандартизованное минимальное
+по норме решение МНК, что у движка numpy, по ковариациям из сумм.
+
+Пара - соседние календарные дни, оба с данными; движки sklearn и numpy соединяют
+соседние строки истории, даже если между ними пропуск. На полной истории результаты совпадают.
+"""
+import numpy as np
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+from forecast_model import LinearModel, FEATURE_COLS, TARGET_COLS
+
+ENGINE = 'incremental'
+MODEL = LinearModel
+# Движок обучается по матрице дней (HistoryReader.read_days) и хранит статистики окна между вызовами
+INCREMENTAL = True
+
+N_FEATS = len(FEATURE_COLS)
+TARGET_IDX = [FEATURE_COLS.index(col) for col in TARGET_COLS]
+_EPS = 10 * np.finfo(np.float64).eps
+# Отсечение собственных чисел нормальной матрицы: соответствует отсечению сингулярных чисел
+# признаков на уровне 1e-6, точнее по суммам не различить
+_RCOND = 1e-12
+# Насколько далеко от конца окна искать последний день с данными для признаков прогноза (дни)
+LAST_FEATURES_LOOKBACK = 31
+
+
+@dataclass
+class WindowStats:
+    """Суммы по парам дней окна [start_date, end_date]: цели - дни start_date + 1 .. end_date."""
+    start_date: date
+    end_date: date
+    moments: np.ndarray     # Σ z zᵀ, z = [1, признаки дня d - 1, цели дня d]
+
+
+def _dayofyear(first: date, n: int) -> np.ndarray:
+    days = np.datetime64(first.isoformat(), 'D') + np.arange(n)
+    return (days - days.astype('datetime64[Y]')).astype(np.int64) + 1
+
+
+def _rows(segments, lo: date, hi: date) -> np.ndarray:
+    """Дни lo..hi из отрезков истории [(первый день, матрица дней)], прочитанных по history_spans."""
+    for first, days in segments:
+        if first <= lo and hi < first + timedelta(days=len(days)):
+            return days[(lo - first).days:(hi - first).days + 1]
+    raise ValueError(f'History from {lo} to {hi} was not read')
+
+
+def _pair_moments(segments, lo: date, hi: date) -> np.ndarray:
+    """Σ z zᵀ по парам с целевыми днями lo..hi."""
+    if hi < lo:
+        return np.zeros((1 + N_FEATS + len(TARGET_IDX),) * 2)
+    days = _rows(segments, lo - timedelta(days=1), hi)
+    prev = days[:-1]
+    z = np.hstack([
+        np.ones((len(prev), 1)),
+        prev,
+        _dayofyear(lo - timedelta(days=1), len(prev))[:, None],
+        days[1:][:, TARGET_IDX]
+    ])
+    z = z[~np.isnan(z).any(axis=1)]
+    return z.T @ z
+
+
+def _steps(stats: WindowStats | None, start_date: date, end_date: date) -> list[tuple[int, date, date]] | None:
+    """
+    Сдвиг stats к окну: [(знак, первый целевой день, последний)] - пары добавляемых
+    и вычитаемых дней. None, если окна не пересекаются или пересчитать окно дешевле.
+    """
+    if (stats is None or stats.start_date > end_date or stats.end_date < start_date
+            or abs((start_date - stats.start_date).days) + abs((end_date - stats.end_date).days)
+            >= (end_date - start_date).days):
+        return None
+    # Целевые дни окна: start_date + 1 .. end_date
+    day = timedelta(days=1)
+    return [
+        (1, start_date + day, stats.start_date),
+        (1, stats.end_date + day, end_date),
+        (-1, stats.start_date + day, start_date),
+        (-1, end_date + day, stats.end_date),
+    ]
+
+
+def _update(stats: WindowStats | None, segments, start_date: date, end_date: date) -> WindowStats:
+    """Статистики окна: сдвигом stats, если окна пересекаются и это дешевле, иначе заново."""
+    steps = _steps(stats, start_date, end_date)
+    if steps is None:
+        return WindowStats(start_date, end_date, _pair_moments(segments, start_date + timedelta(days=1), end_date))
+    moments = stats.moments.copy()
+    for sign, lo, hi in steps:
+        moments += sign * _pair_moments(segments, lo, hi)
+    return WindowStats(start_date, end_date, moments)
+
+
+def solve(moments: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """(coef, intercept) в исходных единицах по суммам Σ z zᵀ."""
+    n = moments[0, 0]
+    if n < 2:
+        raise RuntimeError('Not enough history pairs')
+    mean = moments[0, 1:] / n
+    cov = moments[1:, 1:] / n - np.outer(mean, mean)
+    scale = np.sqrt(np.clip(np.diag(cov), 0, None))
+    scale[scale < _EPS] = 1.0
+    corr = cov / np.outer(scale, scale)
+
+    sx, sy = scale[:N_FEATS], scale[N_FEATS:]
+    W = np.linalg.pinv(corr[:N_FEATS, :N_FEATS], rcond=_RCOND, hermitian=True) @ corr[:N_FEATS, N_FEATS:]
+    coef = (W * sy[None, :] / sx[:, None]).T
+    intercept = mean[N_FEATS:] - coef @ mean[:N_FEATS]
+    return coef, intercept
+
+
+def _last_features(segments, start_date: date, end_date: date) -> tuple[np.ndarray, date]:
+    lo = max(start_date, end_date - timedelta(days=LAST_FEATURES_LOOKBACK))
+    days = _rows(segments, lo, end_date)
+    rows = np.flatnonzero(~np.isnan(days).any(axis=1))
+    if not len(rows):
+        raise RuntimeError(f'No weather history from {lo} to {end_date}')
+    last_date = lo + timedelta(days=int(rows[-1]))
+    return np.append(days[rows[-1]], last_date.timetuple().tm_yday), last_date
+
+
+def history_spans(windows, stats: WindowStats | None = None) -> list[tuple[date, date]]:
+    """
+    Интервалы истории, нужные fit_window_models: при сдвиге окна - только дни,
+    вошедшие в окно и выпавшие из него, и последние дни окна для признаков прогноза;
+    объём чтения зависит от сдвига, а не от длины окна.
+    """
+    day = timedelta(days=1)
+    spans = []
+    for start_date, end_date in sorted(windows, key=lambda w: (w[1], w[0])):
+        steps = _steps(stats, start_date, end_date)
+        if steps is None:
+            spans.append((start_date, end_date))
+        else:
+            # Пара дня d - дни d - 1 и d
+            spans += [(lo - day, hi) for _, lo, hi in steps if lo <= hi]
+        spans.append((max(start_date, end_date - timedelta(days=LAST_FEATURES_LOOKBACK)), end_date))
+        stats = WindowStats(start_date, end_date, None)
+
+    # Пересекающиеся и соседние интервалы читаются одним запросом
+    merged = []
+    for lo, hi in sorted(spans):
+        if merged and lo <= merged[-1][1] + day:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], hi))
+        else:
+            merged.append((lo, hi))
+    return merged
+
+
+def fit_window_models(segments, windows, history_days: int,
+                      stats: WindowStats | None = None) -> tuple[dict, WindowStats]:
+    """
+    Обучает по модели на каждое окно (start_date, end_date). segments - отрезки истории
+    [(первый день, матрица дней HistoryReader.read_days)] по history_spans(windows, stats).
+    Окна обходятся по порядку, статистики сдвигаются от окна к окну начиная с stats;
+    возвращаются модели и статистики последнего окна для следующего вызова.
+    """
+    models = {}
+    for window in sorted(windows, key=lambda w: (w[1], w[0])):
+        stats = _update(stats, segments, *window)
+        try:
+            coef, intercept = solve(stats.moments)
+        except RuntimeError:
+            raise RuntimeError(f"Not enough history from {window[0]} to {window[1]}")
+        last_features, last_date = _last_features(segments, *window)
+        models[window] = LinearModel(
+            coef=coef,
+            intercept=intercept,
+            last_features=last_features,
+            last_date=last_date
+        )
+    return models, stats
@@ -0,0 +1,105 @@
+"""
+Линейная модель на чистом numpy: тот же набор признаков и та же постановка,
+что у ForecasterLinear, но без pandas и sklearn. Масштабирование и решение
+задачи наименьших квадратов для всех целей выполняются одним вызовом,
+несколько рядов (окон или городов) обучаются одним пакетным решением.
+"""
+import numpy as np
+from datetime import date
+
+from forecast_model import LinearModel, FEATURE_COLS, TARGET_COLS, WEATHER_COLS
+
+ENGINE = 'numpy'
+MODEL = LinearModel
+
+TARGET_IDX = [FEATURE_COLS.index(col) for col in TARGET_COLS]
+DAYOFYEAR_IDX = FEATURE_COLS.index('dayofyear')
+# Как в StandardScaler: почти нулевой разброс не масштабируется
+_EPS = 10 * np.finfo(np.float64).eps
+
+
+def history_arrays(records) -> tuple[np.ndarray, np.ndarray]:
+    """Даты (ordinal) и матрица признаков (дни, FEATURE_COLS) из записей сервиса погоды."""
+    dates = np.empty(len(records), dtype=np.int64)
+    feats = np.empty((len(records), len(FEATURE_COLS)), dtype=np.float64)
+    for i, record in enumerate(records):
+        day = date.fromisoformat(record['date'])
+        dates[i] = day.toordinal()
+        for j, col in enumerate(WEATHER_COLS):
+            value = record[col]
+            feats[i, j] = np.nan if value is None else value
+        feats[i, DAYOFYEAR_IDX] = day.timetuple().tm_yday
+    keep = ~np.isnan(feats).any(axis=1)
+    return dates[keep], feats[keep]
+
+
+def _masked_scale(a: np.ndarray, mask: np.ndarray, count: np.ndarray):
+    mean = (a * mask).sum(axis=1, keepdims=True) / count
+    var = (((a - mean) * mask) ** 2).sum(axis=1, keepdims=True) / count
+    scale = np.sqrt(var)
+    scale[scale < _EPS] = 1.0
+    return mean, scale
+
+
+def fit_stacked(series: list[np.ndarray]) -> list[tuple[np.ndarray, np.ndarray]]:
+    """
+    Обучение по нескольким рядам признаков (дни, FEATURE_COLS) одним пакетным решением.
+    Ряды разной длины дополняются нулевыми строками, которые не влияют на решение.
+    Возвращает (coef, intercept) в исходных единицах для каждого ряда.
+    """
+    n_series = len(series)
+    n_rows = max(len(s) for s in series) - 1
+    n_feats, n_targets = len(FEATURE_COLS), len(TARGET_IDX)
+
+    X = np.zeros((n_series, n_rows, n_feats))
+    Y = np.zeros((n_series, n_rows, n_targets))
+    mask = np.zeros((n_series, n_rows, 1))
+    for i, s in enumerate(series):
+        # Цель - температуры следующего дня
+        X[i, :len(s) - 1] = s[:-1]
+        Y[i, :len(s) - 1] = s[1:, TARGET_IDX]
+        mask[i, :len(s) - 1] = 1.0
+    count = mask.sum(axis=1, keepdims=True)
+
+    mx, sx = _masked_scale(X, mask, count)
+    my, sy = _masked_scale(Y, mask, count)
+    Xs = (X - mx) / sx * mask
+    Ys = (Y - my) / sy * mask
+
+    # Минимальное по норме решение МНК, как у LinearRegression (lstsq). Сингулярные числа
+    # на уровне ошибок округления отбрасываются: при окне короче числа признаков
+    # (7 дней -> 6 строк) матрица заведомо вырождена и они не несут информации
+    rcond = np.finfo(np.float64).eps * max(n_rows, n_feats)
+    W = np.linalg.pinv(Xs, rcond=rcond) @ Ys        # (ряды, признаки, цели)
+    b = (Ys.sum(axis=1) - np.einsum('sf,sft->st', Xs.sum(axis=1), W)) / count[:, 0]
+
+    mx, sx, my, sy = mx[:, 0], sx[:, 0], my[:, 0], sy[:, 0]
+    coef = np.swapaxes(W, 1, 2) * sy[:, :, None] / sx[:, None, :]
+    intercept = sy * (b - np.einsum('stf,sf->st', np.swapaxes(W, 1, 2), mx / sx)) + my
+    return list(zip(coef, intercept))
+
+
+def fit_window_models(records, windows, history_days=7):
+    """
+    Обучает по модели на каждое окно (start_date, end_date) по истории одного города,
+    покрывающей все окна. Все окна решаются одним пакетным вызовом.
+    """
+    dates, feats = history_arrays(records)
+    windows = list(windows)
+    series, last = [], []
+    for start_date, end_date in windows:
+        rows = (dates >= start_date.toordinal()) & (dates <= end_date.toordinal())
+        if rows.sum() < 2:
+            raise RuntimeError(f"Not enough history from {start_date} to {end_date}")
+        series.append(feats[rows])
+        last.append(date.fromordinal(int(dates[rows][-1])))
+
+    models = {}
+    for window, s, last_date, (coef, intercept) in zip(windows, series, last, fit_stacked(series)):
+        models[window] = LinearModel(
+            coef=coef,
+            intercept=intercept,
+            last_features=s[-1].copy(),
+            last_date=last_date
+        )
+    return models
@@ -0,0 +1,69 @@
+"""
+Гребневая регрессия на лаговых признаках: погода дня, температуры LAGS предыдущих
+дней и сезон (sin/cos дня года) -> температуры следующего дня. Регуляризация
+позволяет обучаться и на окне короче числа признаков; решение сводится к той же
+аффинной LinearModel, что у линейных движков.
+"""
+import numpy as np
+from datetime import timedelta
+
+from forecast_model import LinearModel, WEATHER_COLS, TARGET_COLS, days_matrix
+from predictor_climatology import TARGET_IDX, dayofyear
+
+ENGINE = 'ridge'
+MODEL = LinearModel
+
+# Сколько предыдущих дней температур добавляется к признакам дня
+LAGS = 2
+ALPHA = 1.0
+N_FEATS = len(WEATHER_COLS) + LAGS * len(TARGET_COLS) + 2
+_EPS = 10 * np.finfo(np.float64).eps
+
+
+def lagged_features(values: np.ndarray, first) -> np.ndarray:
+    """Признаки каждого дня (дни, N_FEATS); для первых LAGS дней и дней с пропусками - NaN."""
+    n = len(values)
+    lags = [np.full((n, len(TARGET_IDX)), np.nan) for _ in range(LAGS)]
+    for k, lag in enumerate(lags, start=1):
+        lag[k:] = values[:n - k, TARGET_IDX]
+    angle = 2 * np.pi * dayofyear(first, n) / 365.25
+    return np.hstack([values, *lags, np.sin(angle)[:, None], np.cos(angle)[:, None]])
+
+
+def fit_ridge(X: np.ndarray, Y: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """(coef, intercept) в исходных единицах: ридж на стандартизованных признаках и целях."""
+    mx, sx = X.mean(axis=0), X.std(axis=0)
+    my, sy = Y.mean(axis=0), Y.std(axis=0)
+    sx[sx < _EPS] = 1.0
+    sy[sy < _EPS] = 1.0
+    Xs, Ys = (X - mx) / sx, (Y - my) / sy
+    W = np.linalg.solve(Xs.T @ Xs + ALPHA * np.eye(X.shape[1]), Xs.T @ Ys)
+    coef = (W * sy[None, :] / sx[:, None]).T
+    return coef, my - coef @ mx
+
+
+def fit_window_models(records, windows, history_days=None):
+    """Обучает по модели на каждое окно (start_date, end_date) по истории одного города."""
+    first = min(start for start, _ in windows)
+    values = days_matrix(records, first, max(end for _, end in windows))
+    feats = lagged_features(values, first)
+    present = ~np.isnan(feats).any(axis=1)
+
+    models = {}
+    for start_date, end_date in windows:
+        lo, hi = (start_date - first).days, (end_date - first).days
+        # Строка t: признаки дня t, цели дня t + 1; лаги не выходят за начало окна
+        t = np.arange(lo + LAGS, hi)
+        t = t[present[t] & ~np.isnan(values[t + 1][:, TARGET_IDX]).any(axis=1)]
+        if len(t) < 2:
+            raise RuntimeError(f"Not enough history from {start_date} to {end_date}")
+        coef, intercept = fit_ridge(feats[t], values[t + 1][:, TARGET_IDX])
+
+        last = lo + np.flatnonzero(present[lo:hi + 1])[-1]
+        models[(start_date, end_date)] = LinearModel(
+            coef=coef,
+            intercept=intercept,
+            last_features=feats[last].copy(),
+            last_date=first + timedelta(days=int(last))
+        )
+    return models
@@ -0,0 +1,35 @@
+"""
+Сезонный наивный прогноз: на дату - значения целей в тот же день года годом раньше
+(последний такой день в окне). Самый дешёвый движок, точка отсчёта для остальных.
+"""
+import numpy as np
+from datetime import timedelta
+
+from forecast_model import DayOfYearModel, days_matrix
+from predictor_climatology import TARGET_IDX, YEAR_ROWS, dayofyear, fill_table
+
+ENGINE = 'seasonal-naive'
+MODEL = DayOfYearModel
+
+
+def fit_window_models(records, windows, history_days=None):
+    """Таблица значений последнего года на каждое окно (start_date, end_date) истории одного города."""
+    first = min(start for start, _ in windows)
+    values = days_matrix(records, first, max(end for _, end in windows))[:, TARGET_IDX]
+    doy = dayofyear(first, len(values))
+
+    models = {}
+    for start_date, end_date in windows:
+        # Последние 365 дней окна: дни года в них не повторяются
+        lo = max((start_date - first).days, (end_date - first).days - 364)
+        rows = slice(lo, (end_date - first).days + 1)
+        present = np.flatnonzero(~np.isnan(values[rows]).any(axis=1))
+        if not len(present):
+            raise RuntimeError(f"Not enough history from {start_date} to {end_date}")
+        table = np.full((YEAR_ROWS, len(TARGET_IDX)), np.nan)
+        table[doy[rows][present] - 1] = values[rows][present]
+        models[(start_date, end_date)] = DayOfYearModel(
+            table=fill_table(table),
+            last_date=first + timedelta(days=lo + int(present[-1]))
+        )
+    return models
@@ -1,4 +1,4 @@
-from typing import Dict, Tuple, Literal
+from typing import Dict, List, Tuple, Literal
 from pydantic_settings import BaseSettings
 from pathlib import Path
 
@@ -21,6 +21,70 @@ class Settings(BaseSettings):
     RABBITMQ_USER: str
     RABBITMQ_PASS: str
     RABBITMQ_FC_REQ_QUEUE: str
+    # Аргументы очереди прогнозов - должны совпадать с сервисом погоды: максимальный приоритет
+    # и задержка повтора неудачной задачи в очереди {RABBITMQ_FC_REQ_QUEUE}.retry (секунды)
+    RABBITMQ_MAX_PRIORITY: int = 10
+    RABBITMQ_RETRY_DELAY: int = 30
+    # Партиционирование по городам, как в сервисе погоды: RABBITMQ_PARTITIONS очередей
+    # {RABBITMQ_FC_REQ_QUEUE}.p{N} делятся между живыми воркерами rendezvous-хешированием,
+    # так что каждый воркер держит кеши только своих городов. Партиций должно быть
+    # заметно больше, чем воркеров. 1 - одна общая очередь для всех воркеров
+    RABBITMQ_PARTITIONS: int = 1
+    # Сердцебиение воркера в Redis и срок, после которого его партиции переходят другим (секунды)
+    WORKER_HEARTBEAT_INTERVAL: float = 5.0
+    WORKER_HEARTBEAT_TTL: float = 15.0
+
+    # Воркер: число одновременно обрабатываемых пачек по городам
+    WORKER_CONCURRENCY: int = 4
+    # Микропакеты: сообщения копятся до WORKER_BATCH_SIZE штук или WORKER_BATCH_WINDOW секунд
+    WORKER_BATCH_SIZE: int = 32
+    WORKER_BATCH_WINDOW: float = 0.05
+    # Пул для обучения моделей: 'process' или 'thread'; 0 - по числу ядер
+    WORKER_EXECUTOR: Literal['process', 'thread'] = 'process'
+    WORKER_POOL_SIZE: int = 0
+
+    # Движок прогноза по умолчанию (запрос может выбрать другой, см. engines.py):
+    # 'sklearn' (pandas + scikit-learn), 'numpy' (то же решение без них),
+    # 'incremental' (та же модель по суммам XᵀX / Xᵀy, сдвигаемым на новые дни - для окон в годы),
+    # 'climatology', 'seasonal-naive' (таблицы по дню года) и 'ridge' (ридж на лаговых признаках)
+    FORECAST_ENGINE: Literal['sklearn', 'numpy', 'incremental', 'climatology', 'seasonal-naive', 'ridge'] = 'sklearn'
+    FORECAST_HISTORY_DAYS: int = 7
+    # Окна истории движков, которым не подходит FORECAST_HISTORY_DAYS
+    ENGINE_HISTORY_DAYS: Dict[str, int] = {
+        'climatology': 5 * 365,
+        'seasonal-naive': 366,
+        'ridge': 365,
+    }
+    # Источник истории: 'redis' - напрямую из кеша сервиса погоды, 'http' - через его API
+    HISTORY_SOURCE: Literal['redis', 'http'] = 'redis'
+    # Локальный кеш истории на диске (.npy на город и год, читается через memmap); пусто - без него
+    HISTORY_CACHE_DIR: str = ''
+    # Время жизни статуса задачи (forecast:status:{task_id}), как в сервисе погоды
+    FORECAST_STATUS_TTL: int = 600
+    # Результат хранится до конца даты прогноза и ещё столько секунд
+    FORECAST_RESULT_GRACE: int = 60 * 60 * 24
+    # Сколько раз неудачная задача возвращается в очередь, прежде чем уйти в {RABBITMQ_FC_REQ_QUEUE}.dead
+    WORKER_MAX_RETRIES: int = 3
+
+    # Кеш обученных моделей: размер LRU в процессе и время жизни в Redis (секунды)
+    MODEL_CACHE_SIZE: int = 256
+    MODEL_CACHE_TTL: int = 60 * 60 * 48
+    # Для моделей, обученных на неполном окне (последние дни ещё не опубликованы)
+    MODEL_CACHE_INCOMPLETE_TTL: int = 60 * 60
+
+    # Порт HTTP-экспортёра метрик Prometheus (0 - выключен)
+    METRICS_PORT: int = 9100
+
+    # Предрасчёт: воркер сам обновляет прогнозы по всем городам на PRECOMPUTE_DAYS_AHEAD дней вперёд
+    PRECOMPUTE_ENABLED: bool = False
+    # Как часто проверять появление новой истории (секунды)
+    PRECOMPUTE_INTERVAL: int = 600
+    PRECOMPUTE_DAYS_AHEAD: int = 7
+    # Должен совпадать со списком городов сервиса погоды
+    PRECOMPUTE_CITIES: List[str] = [
+        "Moscow", "New-York", "Washington", "London", "Tokyo", "Paris",
+        "Sydney", "Berlin", "Rio-de-Janeiro", "Cape-Town", "Delhi",
+    ]
 
     @property
     def RABBIT_URL(self) -> str:
@@ -0,0 +1,43 @@
+import os
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+# Настройки воркера читаются при импорте модулей: для тестов хватает заглушек подключений
+for name, value in {
+    'WEATHER_HOST': 'localhost', 'WEATHER_PORT': '80',
+    'REDIS_HOST': 'localhost', 'REDIS_PORT': '6379',
+    'RABBITMQ_HOST': 'localhost', 'RABBITMQ_PORT': '5672',
+    'RABBITMQ_USER': 'guest', 'RABBITMQ_PASS': 'guest',
+    'RABBITMQ_FC_REQ_QUEUE': 'forecast_requests',
+}.items():
+    os.environ.setdefault(name, value)
+
+HISTORY_END = date(2025, 6, 30)
+
+
+def synthetic_records(days: int, seed: int, end: date = HISTORY_END) -> list[dict]:
+    """Сезонный ряд с шумом в формате ответа /weather/range."""
+    rng = np.random.default_rng(seed)
+    records = []
+    for i in range(days):
+        day = end - timedelta(days=days - 1 - i)
+        season = 10 * np.sin(2 * np.pi * day.timetuple().tm_yday / 365.25)
+        avg = season + rng.normal(0, 3)
+        records.append({
+            'date': day.isoformat(),
+            'temp_min': round(avg - abs(rng.normal(4, 1)), 2),
+            'temp_avg': round(avg, 2),
+            'temp_max': round(avg + abs(rng.normal(4, 1)), 2),
+            'humidity_min': round(40 + rng.normal(0, 5), 2),
+            'humidity_avg': round(60 + rng.normal(0, 5), 2),
+            'humidity_max': round(80 + rng.normal(0, 5), 2),
+            'precipitation': round(max(0.0, rng.normal(1, 2)), 2),
+        })
+    return records
+
+
+@pytest.fixture(scope='session')
+def records() -> list[dict]:
+    return synthetic_records(3 * 365, seed=42)
@@ -0,0 +1,82 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+import predictor_incremental
+import predictor_numpy
+from engines import ENGINE_MODULES, load_engine
+from forecast_model import days_matrix, training_window
+from conftest import HISTORY_END
+
+HISTORY_DAYS = 365
+HORIZON = [HISTORY_END + timedelta(days=h) for h in range(1, 8)]
+
+
+def prediction_matrix(model, dates) -> np.ndarray:
+    return np.array([[value for key, value in forecast.items() if key != 'date']
+                     for forecast in model.predict_many(dates)], dtype=float)
+
+
+def fit(engine, records, windows, history_days=HISTORY_DAYS):
+    if getattr(engine, 'INCREMENTAL', False):
+        spans = engine.history_spans(windows)
+        segments = [(lo, days_matrix(records, lo, hi)) for lo, hi in spans]
+        models, _ = engine.fit_window_models(segments, windows, history_days)
+        return models
+    return engine.fit_window_models(records, windows, history_days)
+
+
+def test_numpy_matches_sklearn(records):
+    predictor = pytest.importorskip('predictor')
+    # Окна длиннее числа признаков: решение определено однозначно
+    history_days = 60
+    windows = sorted({training_window(HISTORY_END - timedelta(days=k), history_days) for k in range(0, 120, 7)})
+    reference = predictor.fit_window_models(records, windows, history_days)
+    models = predictor_numpy.fit_window_models(records, windows, history_days)
+    for window in windows:
+        np.testing.assert_allclose(
+            prediction_matrix(models[window], HORIZON),
+            prediction_matrix(reference[window], HORIZON),
+            atol=1e-6
+        )
+
+
+@pytest.mark.parametrize('name', list(ENGINE_MODULES))
+def test_model_bytes_round_trip(name, records):
+    if name == 'sklearn':
+        pytest.importorskip('sklearn')
+    engine = load_engine(name)
+    window = training_window(HORIZON[0], HISTORY_DAYS)
+    model = fit(engine, records, [window])[window]
+
+    restored = engine.MODEL.from_bytes(model.to_bytes())
+    assert restored.last_date == model.last_date
+    np.testing.assert_array_equal(prediction_matrix(restored, HORIZON), prediction_matrix(model, HORIZON))
+
+
+def test_incremental_sliding_matches_full_refit(records):
+    history_days = 2 * 365
+    days = days_matrix(records, date.fromisoformat(records[0]['date']), HISTORY_END)
+    # Пропуск в истории: пары с отсутствующими днями не учитываются ни при сдвиге, ни заново
+    first = date.fromisoformat(records[0]['date'])
+    days[400:410] = np.nan
+
+    def segments_for(spans):
+        return [(lo, days[(lo - first).days:(hi - first).days + 1]) for lo, hi in spans]
+
+    stats = None
+    for shift in range(10, -1, -1):
+        end_date = HISTORY_END - timedelta(days=shift)
+        window = (end_date - timedelta(days=history_days - 1), end_date)
+        spans = predictor_incremental.history_spans([window], stats)
+        sliding, stats = predictor_incremental.fit_window_models(segments_for(spans), [window], history_days, stats)
+        if shift < 10:
+            # Сдвиг на день читает несколько дней на краях окна, а не всё окно
+            assert sum((hi - lo).days + 1 for lo, hi in spans) < history_days // 10
+
+        spans = predictor_incremental.history_spans([window])
+        full, full_stats = predictor_incremental.fit_window_models(segments_for(spans), [window], history_days)
+        np.testing.assert_allclose(stats.moments, full_stats.moments, rtol=1e-9)
+        np.testing.assert_allclose(sliding[window].coef, full[window].coef, atol=1e-9)
+        np.testing.assert_allclose(sliding[window].intercept, full[window].intercept, atol=1e-9)
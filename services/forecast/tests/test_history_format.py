@@ -0,0 +1,68 @@
+import asyncio
+import importlib.util
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+
+from history import WEATHER_FIELDS, HistoryReader
+
+# Кодировщик записей сервиса погоды: воркер читает строки weather:ts:*, которые пишет он
+DAILY_STORE = Path(__file__).resolve().parents[2] / 'weather' / 'app' / 'utils' / 'daily_store.py'
+spec = importlib.util.spec_from_file_location('weather_daily_store', DAILY_STORE)
+daily_store = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(daily_store)
+
+
+class MonthStrings:
+    """Redis с помесячными строками: SETRANGE дописывает нули до смещения, как Redis."""
+
+    def __init__(self):
+        self.data: dict[str, bytearray] = {}
+
+    def setrange(self, key: str, offset: int, value: bytes):
+        buf = self.data.setdefault(key, bytearray())
+        if len(buf) < offset + len(value):
+            buf.extend(bytes(offset + len(value) - len(buf)))
+        buf[offset:offset + len(value)] = value
+
+    async def mget(self, keys):
+        return [bytes(self.data[key]) if key in self.data else None for key in keys]
+
+
+def test_worker_decodes_weather_service_records():
+    assert WEATHER_FIELDS == daily_store.WEATHER_FIELDS
+
+    redis = MonthStrings()
+    start = date(2025, 1, 28)
+    written = {}
+    for i in range(10):
+        day = start + timedelta(days=i)
+        if day == date(2025, 2, 1):
+            continue    # дня нет в кеше: нули в строке месяца
+        values = [round(-5.25 + i, 2), 0.1 * i, 3.0, 40.0, 55.5, 90.0, 1.75]
+        redis.setrange(daily_store.month_key('Moscow', day), daily_store.record_offset(day),
+                       daily_store.encode_record(values, daily_store.hours_now()))
+        written[day.isoformat()] = values
+
+    class NoHttp:
+        def get(self, *args, **kwargs):
+            raise AssertionError('all days are cached')
+
+    reader = HistoryReader(redis, NoHttp(), source='redis')
+    # Отсутствующий день дочитывался бы по HTTP: читаем интервалы вокруг него
+    records = asyncio.run(reader.read('Moscow', start, date(2025, 1, 31)))
+    records += asyncio.run(reader.read('Moscow', date(2025, 2, 2), start + timedelta(days=9)))
+
+    assert [record['date'] for record in records] == list(written)
+    for record in records:
+        np.testing.assert_allclose([record[field] for field in WEATHER_FIELDS], written[record['date']], atol=1e-3)
+
+
+def test_weather_service_block_round_trip():
+    values = [[-12.5, -10.0, -7.25, 70.0, 80.0, 95.5, 0.0], [1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0]]
+    buf = b''.join(daily_store.encode_record(v, 480000.0) for v in values)
+    block = daily_store.decode_block(buf + bytes(4))    # хвост неполной записи отбрасывается
+    assert block.shape == (2, daily_store.RECORD_FIELDS)
+    np.testing.assert_array_equal(block[:, 0], 480000.0)
+    np.testing.assert_allclose(block[:, 1:], values, atol=1e-3)
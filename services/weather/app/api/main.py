@@ -1,7 +1,9 @@
 from fastapi import APIRouter
 
-from app.api.routes import weather, forecast
+from app.api.routes import weather, forecast, stats, health
 
 api_router = APIRouter()
 api_router.include_router(weather.router)
-api_router.include_router(forecast.router)
\ No newline at end of file
+api_router.include_router(forecast.router)
+api_router.include_router(stats.router)
+api_router.include_router(health.router)
\ No newline at end of file
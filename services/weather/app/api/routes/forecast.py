@@ -1,19 +1,40 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from typing import Annotated
 
 from app.schemas.forecast import *
+from app.connections.rabbitmq import PublishError
 from app.services.forecast import ForecastService
 from app.core.dependencies import get_forecast_service
 
 router = APIRouter(tags=["forecast"])
 
-@router.get("/forecast")
+@router.get("/forecast",
+            responses={status.HTTP_202_ACCEPTED: {'model': ForecastStatusResponse}})
 async def get_forecast_results(query: Annotated[ForecastTaskQuery, Query()], 
+                               response: Response,
                                service: ForecastService = Depends(get_forecast_service)):
-    
-    fc = await service.get_forecast(query.task_id)
+    '''
+    Результат прогноза по идентификатору задачи.
+    С параметром wait запрос удерживается до готовности прогноза, но не дольше wait секунд.
+    Пока прогноз рассчитывается, возвращается 202 с состоянием задачи
+    '''
+    fc = await service.get_forecast(query.task_id, query.wait)
 
     if not fc:
+        task_status = await service.get_forecast_status(query.task_id)
+        if task_status in ('queued', 'running'):
+            response.status_code = status.HTTP_202_ACCEPTED
+            return ForecastStatusResponse(task_id=query.task_id, status=task_status)
+        if task_status == 'failed':
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f'Не удалось рассчитать прогноз {query.task_id}, повторите запрос'
+            )
+        if task_status == 'expired':
+            raise HTTPException(
+                status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                detail=f'Прогноз {query.task_id} не был рассчитан в срок, повторите запрос'
+            )
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f'Прогноз с идентификатором {query.task_id} не найден'
@@ -28,14 +49,20 @@ async def get_forecast_results(query: Annotated[ForecastTaskQuery, Query()],
 async def request_forecast(req: ForecastPostRequest,
                            service: ForecastService = Depends(get_forecast_service)):
     
-    task_id = await service.request_forecast(req.city, req.date_)
+    try:
+        task_id = await service.request_forecast(req.city, req.date_, req.model)
+    except PublishError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail='Очередь прогнозов недоступна, повторите запрос позже'
+        )
 
     if task_id is None:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail={
                 "message": "Запрашиваемый прогноз уже существует",
-                "forecast_id": str(service._generate_task_id(req.city, req.date_))
+                "forecast_id": str(service._generate_task_id(req.city, req.date_, req.model))
             }
         )
 
@@ -46,3 +73,54 @@ async def request_forecast(req: ForecastPostRequest,
     )
 
     return response
+
+
+@router.post("/forecast/batch",
+             status_code=status.HTTP_202_ACCEPTED,
+             response_model=ForecastBatchPostResponse)
+async def request_forecast_batch(req: ForecastBatchPostRequest,
+                                 service: ForecastService = Depends(get_forecast_service)):
+    '''
+    Пакетный запрос прогнозов. Повторяющиеся пары город/дата объединяются,
+    уже готовые прогнозы возвращаются со статусом ready, остальные ставятся в очередь
+    '''
+    try:
+        results = await service.request_forecast_batch(
+            [(item.city, item.date_, item.model) for item in req.items]
+        )
+    except PublishError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail='Очередь прогнозов недоступна, повторите запрос позже'
+        )
+
+    response = ForecastBatchPostResponse(
+        items=[
+            ForecastBatchItem(
+                city=city,
+                date=date_,
+                model=model,
+                task_id=task_id,
+                status='ready' if ready else 'accepted'
+            )
+            for city, date_, model, task_id, ready in results
+        ],
+        msg="Недостающие прогнозы переданы в обработку"
+    )
+
+    return response
+
+@router.get("/forecast/batch", response_model=ForecastBatchResponse)
+async def get_forecast_batch_results(query: Annotated[ForecastBatchQuery, Query()],
+                                     service: ForecastService = Depends(get_forecast_service)):
+    '''Возвращает все запрошенные прогнозы за один запрос, неготовые помечаются ready=false'''
+    forecasts = await service.get_forecast_batch(query.task_id)
+
+    response = ForecastBatchResponse(
+        results=[
+            ForecastBatchResult(task_id=task_id, ready=fc is not None, status=task_status, forecast=fc)
+            for task_id, (fc, task_status) in forecasts.items()
+        ]
+    )
+
+    return response
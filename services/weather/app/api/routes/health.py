@@ -0,0 +1,33 @@
+import asyncio
+from fastapi import APIRouter, Depends
+from fastapi.responses import JSONResponse
+
+from app.core.config import settings
+from app.core.dependencies import get_redis, get_rabbitmq
+
+router = APIRouter(prefix="/health", tags=["service"])
+
+@router.get("/live", summary='Процесс жив')
+async def live():
+    '''Отвечает, пока цикл событий воркера обрабатывает запросы; зависимости не проверяются'''
+    return {'status': 'ok'}
+
+@router.get("/ready", summary='Воркер готов принимать запросы')
+async def ready(redis = Depends(get_redis), rabbitmq = Depends(get_rabbitmq)):
+    '''
+    Проверяет зависимости воркера: Redis отвечает на PING за HEALTH_CHECK_TIMEOUT,
+    соединение и канал RabbitMQ открыты. Если что-то недоступно - 503 с состоянием каждой
+    '''
+    checks = {}
+    try:
+        await asyncio.wait_for(redis.ping(), settings.HEALTH_CHECK_TIMEOUT)
+        checks['redis'] = 'ok'
+    except Exception as e:
+        checks['redis'] = f'unavailable: {e!r}'
+    checks['rabbitmq'] = 'ok' if rabbitmq.is_connected() else 'unavailable'
+
+    ok = all(check == 'ok' for check in checks.values())
+    return JSONResponse(
+        status_code=200 if ok else 503,
+        content={'status': 'ok' if ok else 'unavailable', 'checks': checks}
+    )
@@ -0,0 +1,56 @@
+import os
+from fastapi import APIRouter, Depends, Request, Response
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, generate_latest, multiprocess
+
+from app.core.metrics import ServiceStatsCollector
+from app.core.dependencies import (get_weather_flight, get_weather_l1, get_warmup, get_forecast_notifier, get_rabbitmq,
+                                   get_openmeteo, get_startup)
+from app.utils.singleflight import SingleFlight
+from app.utils.lru import LRUCache
+from app.utils.notifier import ForecastNotifier
+
+router = APIRouter(tags=["service"])
+
+@router.get("/stats", summary='Счётчики работы сервиса')
+async def get_stats(flight: SingleFlight = Depends(get_weather_flight),
+                    l1: LRUCache = Depends(get_weather_l1),
+                    warmup = Depends(get_warmup),
+                    notifier: ForecastNotifier = Depends(get_forecast_notifier),
+                    rabbitmq = Depends(get_rabbitmq),
+                    upstream = Depends(get_openmeteo),
+                    startup: dict = Depends(get_startup)):
+    '''
+    Возвращает внутренние счётчики процесса (при нескольких воркерах - того, что обработал запрос)
+    - **startup**: pid воркера и холодный старт - импорт приложения, подключения и их сумма (секунды)
+    - **weather_fetch**: запросы к Open-Meteo, инициированные (originated) и объединённые (coalesced),
+      а также дни, отданные из устаревшего кеша при недоступности API (stale_served)
+    - **upstream**: вызовы Open-Meteo, повторы, отказы по лимиту и размыкателю, состояние цепи
+    - **weather_l1**: попадания, промахи и заполненность кеша погоды в памяти процесса
+    - **warmup**: запуски прогрева кеша, длительность и покрытие последнего (если включён)
+    - **forecast_wait**: ожидания прогнозов через GET /forecast?wait=, разбуженные и истёкшие
+    - **forecast_publish**: публикации задач в очередь, задержка подтверждения и глубина очереди
+    '''
+    return {
+        'startup': startup,
+        'weather_fetch': dict(flight.counters),
+        'upstream': upstream.stats(),
+        'weather_l1': l1.stats(),
+        'warmup': warmup.stats if warmup is not None else None,
+        'forecast_wait': notifier.stats(),
+        'forecast_publish': await rabbitmq.publisher.stats()
+    }
+
+@router.get("/metrics", summary='Метрики в формате Prometheus')
+async def get_metrics(request: Request):
+    '''
+    Гистограммы задержек горячего пути, счётчики кешей и счётчики /stats для сборщика Prometheus.
+    При нескольких воркерах (задан PROMETHEUS_MULTIPROC_DIR) гистограммы и счётчики суммируются
+    по всем воркерам, а счётчики /stats живут в памяти процесса и отдаются воркером,
+    ответившим на запрос, с меткой pid
+    '''
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        registry.register(ServiceStatsCollector(request.app.state, pid=os.getpid()))
+        return Response(content=generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
@@ -1,11 +1,22 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from typing import Annotated
 
+from app.connections.openmeteo import UpstreamUnavailable
+from app.core.config import settings
 from app.services.weather import WeatherService
-from app.schemas.weather import WeatherQuery, WeatherResponse
+from app.schemas.weather import WeatherQuery, WeatherResponse, WeatherRangeQuery, WeatherRangeResponse, WeatherDay
 from app.core.dependencies import get_weather_service
 
 router = APIRouter(tags=["weather"])
 
+def upstream_unavailable() -> HTTPException:
+    '''Источник данных недоступен, а в кеше нет даже устаревших записей'''
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail='Сервис погодных данных временно недоступен, повторите запрос позже',
+        headers={'Retry-After': str(int(settings.UPSTREAM_BREAKER_RESET))}
+    )
+
 @router.get("/weather",
             summary='Получить погоду',
             response_model=WeatherResponse)
@@ -16,11 +27,20 @@ async def get_weather(query: WeatherQuery = Depends(),
     - **city**: название города
     - **date**: дата
     '''
-    weather = await service.get_weather(
-        query.city,
-        date=query.date_
-    )
-    
+    try:
+        weather = await service.get_weather(
+            query.city,
+            date=query.date_
+        )
+    except UpstreamUnavailable:
+        raise upstream_unavailable()
+    if weather is None:
+        # API отклонил запрос или ещё не имеет данных за этот день (например, за вчера)
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f'Нет данных о погоде в {query.city} на {query.date_.isoformat()}'
+        )
+
     response = WeatherResponse(
         city=query.city,
         date=query.date_,
@@ -28,3 +48,29 @@ async def get_weather(query: WeatherQuery = Depends(),
     )
 
     return response
+
+
+@router.get("/weather/range",
+            summary='Получить погоду за интервал дат',
+            response_model=WeatherRangeResponse)
+async def get_weather_range(query: Annotated[WeatherRangeQuery, Query()],
+                            service: WeatherService = Depends(get_weather_service)):
+    '''
+    Возвращает метеорологические данные для заданного города за интервал дат (включительно)
+    - **city**: название города
+    - **start**: первая дата
+    - **end**: последняя дата
+    '''
+    try:
+        weather = await service.get_weather_range(query.city, query.start, query.end)
+    except UpstreamUnavailable:
+        raise upstream_unavailable()
+
+    response = WeatherRangeResponse(
+        city=query.city,
+        start=query.start,
+        end=query.end,
+        days=[WeatherDay(date=d, **w.model_dump()) for d, w in weather.items()]
+    )
+
+    return response
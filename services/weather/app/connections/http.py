@@ -0,0 +1,27 @@
+import aiohttp
+from typing import Optional
+
+from app.core.config import settings
+
+class HttpClient:
+    '''Общая на процесс HTTP-сессия с keep-alive для обращений к внешним API'''
+
+    def __init__(self):
+        self.session: Optional[aiohttp.ClientSession] = None
+
+    async def connect(self):
+        connector = aiohttp.TCPConnector(
+            limit=settings.HTTP_POOL_SIZE,
+            limit_per_host=settings.HTTP_POOL_SIZE_PER_HOST,
+            keepalive_timeout=settings.HTTP_KEEPALIVE_TIMEOUT,
+            ttl_dns_cache=settings.HTTP_DNS_CACHE_TTL
+        )
+        timeout = aiohttp.ClientTimeout(
+            total=settings.HTTP_TIMEOUT,
+            connect=settings.HTTP_CONNECT_TIMEOUT
+        )
+        self.session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+    async def close(self):
+        if self.session and not self.session.closed:
+            await self.session.close()
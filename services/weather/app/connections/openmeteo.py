@@ -0,0 +1,146 @@
+from collections import Counter
+import asyncio
+import random
+import time
+
+import aiohttp
+from redis.exceptions import RedisError
+
+from app.connections.http import HttpClient
+from app.connections.redis import RedisClient
+from app.core.config import settings
+from app.core.logger import logger
+from app.core.metrics import API_FETCH_SECONDS
+from app.utils.circuit_breaker import CircuitBreaker
+
+# Общий для всех воркеров token bucket: время берётся из Redis, чтобы не зависеть от часов узлов.
+# Возвращает 0, если токен выдан, иначе - сколько секунд ждать следующего
+TOKEN_BUCKET_SCRIPT = '''
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000) + 1000)
+return tostring(wait)
+'''
+
+# Ответы, после которых запрос имеет смысл повторить
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+class UpstreamUnavailable(Exception):
+    '''Open-Meteo недоступен: цепь разомкнута, исчерпаны повторы или лимит запросов'''
+
+class OpenMeteoClient:
+    '''
+    Клиент архивного API Open-Meteo: общий через Redis лимит частоты запросов,
+    ограниченные повторы с экспоненциальной задержкой и разбросом на 429/5xx,
+    таймаут на вызов и размыкатель цепи.
+    '''
+
+    RATE_LIMIT_KEY = 'ratelimit:openmeteo'
+
+    def __init__(self, http: HttpClient, redis: RedisClient):
+        self.http = http
+        self.redis = redis
+        self.breaker = CircuitBreaker(settings.UPSTREAM_BREAKER_THRESHOLD, settings.UPSTREAM_BREAKER_RESET)
+        self._bucket = redis.client.register_script(TOKEN_BUCKET_SCRIPT)
+        self.counters = Counter(requests=0, retries=0, throttled=0, rejected=0, failures=0)
+
+    def stats(self) -> dict:
+        return {**self.counters, 'circuit': self.breaker.state}
+
+    async def _acquire(self) -> None:
+        '''Ждёт токен общего лимита, но не дольше UPSTREAM_RATE_WAIT'''
+        if not settings.UPSTREAM_RATE_LIMIT:
+            return
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.UPSTREAM_RATE_WAIT
+        while True:
+            try:
+                wait = float(await self._bucket(
+                    keys=[self.RATE_LIMIT_KEY],
+                    args=[settings.UPSTREAM_RATE_LIMIT, settings.UPSTREAM_RATE_BURST]
+                ))
+            except RedisError:
+                # Без Redis лимит не согласовать между воркерами: запросы не блокируем
+                logger.warning('Upstream rate limiter unavailable, proceeding without it')
+                return
+            if wait <= 0:
+                return
+            if loop.time() + wait > deadline:
+                self.counters['throttled'] += 1
+                raise UpstreamUnavailable('Upstream rate limit exceeded')
+            await asyncio.sleep(wait)
+
+    @staticmethod
+    def _backoff(attempt: int, retry_after: str | None) -> float:
+        if retry_after is not None and retry_after.isdigit():
+            return min(float(retry_after), settings.UPSTREAM_BACKOFF_MAX)
+        # Full jitter: равномерно от 0 до экспоненциально растущей границы
+        return random.uniform(0, min(settings.UPSTREAM_BACKOFF_MAX, settings.UPSTREAM_BACKOFF_BASE * 2 ** attempt))
+
+    async def get_archive(self, params: dict) -> dict | None:
+        '''
+        GET архивного API. Возвращает JSON ответа, None - если API отклонил запрос (4xx кроме 429).
+        При недоступности API бросает UpstreamUnavailable
+        '''
+        if not self.breaker.allow():
+            self.counters['rejected'] += 1
+            raise UpstreamUnavailable('Upstream circuit is open')
+
+        try:
+            ok, data = await self._request_with_retries(params)
+        except BaseException:
+            # Упёрлись в собственный лимит или вызов отменён - API тут ни при чём
+            self.breaker.cancel()
+            raise
+
+        if not ok:
+            self.counters['failures'] += 1
+            self.breaker.failure()
+            raise UpstreamUnavailable(f'Upstream failed after {settings.UPSTREAM_RETRIES + 1} attempts')
+        self.breaker.success()
+        return data
+
+    async def _request_with_retries(self, params: dict) -> tuple[bool, dict | None]:
+        timeout = aiohttp.ClientTimeout(total=settings.UPSTREAM_TIMEOUT)
+        for attempt in range(settings.UPSTREAM_RETRIES + 1):
+            if attempt:
+                self.counters['retries'] += 1
+            await self._acquire()
+
+            self.counters['requests'] += 1
+            started = time.perf_counter()
+            status, retry_after = None, None
+            try:
+                async with self.http.session.get(settings.ARCHIVE_WEATHER_URL, params=params, timeout=timeout) as response:
+                    status = response.status
+                    if status == 200:
+                        data = await response.json()
+                    retry_after = response.headers.get('Retry-After')
+                API_FETCH_SECONDS.labels(status).observe(time.perf_counter() - started)
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                # ValueError - тело ответа 200 не разбирается как JSON: повторяем, как на 5xx
+                API_FETCH_SECONDS.labels('error').observe(time.perf_counter() - started)
+                logger.warning(f'Upstream request failed (attempt {attempt + 1}): {e!r}')
+                status = None
+
+            if status == 200:
+                return True, data
+            if status is not None and status not in RETRY_STATUSES:
+                logger.warning(f'Upstream rejected request with status {status}')
+                return True, None
+            if attempt < settings.UPSTREAM_RETRIES:
+                await asyncio.sleep(self._backoff(attempt, retry_after))
+        return False, None
@@ -1,17 +1,169 @@
-from aio_pika import connect_robust, RobustConnection, RobustChannel
+from aio_pika import connect_robust, Message, RobustConnection, RobustChannel, RobustQueue
+from collections import Counter, deque
+from datetime import datetime, timezone
 from typing import Optional
+import asyncio
+import hashlib
+import time
 
 from app.core.config import settings
+from app.core.metrics import PUBLISH_FAILURES, PUBLISH_SECONDS
+
+class PublishError(Exception):
+    '''Сообщение не подтверждено брокером (ошибка, nack или таймаут)'''
+
+def partition_queue_name(partition: int, queue: str = settings.RABBITMQ_FC_REQ_QUEUE) -> str:
+    '''Очередь партиции; при одной партиции - сама RABBITMQ_FC_REQ_QUEUE'''
+    return queue if settings.RABBITMQ_PARTITIONS == 1 else f'{queue}.p{partition}'
+
+def city_partition(city: str) -> int:
+    '''Партиция города: устойчивый хеш, одинаковый во всех процессах и в воркере'''
+    digest = hashlib.sha256(city.encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') % settings.RABBITMQ_PARTITIONS
+
+def retry_queue_name(queue: str) -> str:
+    return f'{queue}.retry'
+
+def dead_queue_name(queue: str = settings.RABBITMQ_FC_REQ_QUEUE) -> str:
+    return f'{queue}.dead'
+
+async def declare_forecast_queues(channel: RobustChannel) -> list[RobustQueue]:
+    '''
+    Очереди прогнозов, как их объявляет воркер: по очереди с приоритетами на партицию,
+    отклонённые воркером задачи уходят в {очередь}.retry и через RABBITMQ_RETRY_DELAY
+    возвращаются обратно; общая {RABBITMQ_FC_REQ_QUEUE}.dead - задачи, исчерпавшие повторы
+    '''
+    await channel.declare_queue(dead_queue_name(), durable=True)
+    queues = []
+    for partition in range(settings.RABBITMQ_PARTITIONS):
+        queue = partition_queue_name(partition)
+        await channel.declare_queue(retry_queue_name(queue), durable=True, arguments={
+            'x-message-ttl': settings.RABBITMQ_RETRY_DELAY * 1000,
+            'x-dead-letter-exchange': '',
+            'x-dead-letter-routing-key': queue,
+        })
+        queues.append(await channel.declare_queue(queue, durable=True, arguments={
+            'x-max-priority': settings.RABBITMQ_MAX_PRIORITY,
+            'x-dead-letter-exchange': '',
+            'x-dead-letter-routing-key': retry_queue_name(queue),
+        }))
+    return queues
+
+class Publisher:
+    '''
+    Публикация задач в очереди прогнозов с подтверждениями брокера. Задача уходит
+    в очередь партиции своего города: воркер, владеющий партицией, держит кеши её городов.
+    Число неподтверждённых сообщений ограничено окном: при его заполнении
+    новые публикации ждут, а не копятся в памяти.
+    '''
+
+    # Сколько секунд /stats отдаёт уже измеренную глубину очередей
+    DEPTH_TTL = 5.0
+
+    def __init__(self, connection: RobustConnection, channel: RobustChannel, queues: list[RobustQueue],
+                 max_in_flight: int = settings.RABBITMQ_PUBLISH_WINDOW,
+                 timeout: float = settings.RABBITMQ_PUBLISH_TIMEOUT):
+        self.connection = connection
+        self.channel = channel
+        self.queues = queues
+        self.timeout = timeout
+        self._window = asyncio.Semaphore(max_in_flight)
+        self.in_flight = 0
+        self._latencies = deque(maxlen=1024)
+        self.counters = Counter(published=0, failed=0)
+        self._depths: Optional[dict] = None
+        self._depths_at = 0.0
+
+    async def _publish(self, queue: str, body: bytes, priority: int) -> None:
+        async with self._window:
+            self.in_flight += 1
+            started = time.perf_counter()
+            try:
+                await asyncio.wait_for(
+                    self.channel.default_exchange.publish(
+                        # Время постановки - для оценки задержки в очереди на стороне воркера
+                        Message(body=body, timestamp=datetime.now(timezone.utc), priority=priority),
+                        routing_key=queue
+                    ),
+                    self.timeout
+                )
+            except Exception as e:
+                self.counters['failed'] += 1
+                PUBLISH_FAILURES.inc()
+                raise PublishError(f'Publish to {queue} failed: {e!r}') from e
+            finally:
+                self.in_flight -= 1
+            latency = time.perf_counter() - started
+            self._latencies.append(latency)
+            PUBLISH_SECONDS.observe(latency)
+            self.counters['published'] += 1
+
+    async def publish_many(self, messages: list[tuple[str, bytes]], priority: int = 0) -> None:
+        '''
+        Публикует пачку сообщений (город, тело) подряд с общим приоритетом,
+        подтверждения ожидаются разом
+        '''
+        results = await asyncio.gather(
+            *(self._publish(self.queues[city_partition(city)].name, body, priority) for city, body in messages),
+            return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+
+    async def queue_depth(self, names: list[str]) -> Optional[int]:
+        '''
+        Число сообщений в очередях (пассивное объявление). Проверка идёт в отдельном
+        временном канале: ошибка для удалённой очереди закрывает канал, и канал публикаций
+        не должен от этого страдать
+        '''
+        total = 0
+        try:
+            async with self.connection.channel() as probe:
+                for name in names:
+                    queue = await probe.declare_queue(name, passive=True)
+                    total += queue.declaration_result.message_count
+        except Exception:
+            return None
+        return total
+
+    async def queue_depths(self) -> dict:
+        '''Глубина основных, повторных и общей отклонённой очереди, не чаще раза в DEPTH_TTL секунд'''
+        if self._depths is None or time.monotonic() - self._depths_at > self.DEPTH_TTL:
+            self._depths = {
+                'queue_depth': await self.queue_depth([queue.name for queue in self.queues]),
+                'retry_depth': await self.queue_depth([retry_queue_name(queue.name) for queue in self.queues]),
+                'dead_depth': await self.queue_depth([dead_queue_name()]),
+            }
+            self._depths_at = time.monotonic()
+        return self._depths
+
+    async def stats(self) -> dict:
+        latencies = sorted(self._latencies)
+        def percentile(q: float):
+            return round(latencies[int(q * (len(latencies) - 1))] * 1000, 3) if latencies else None
+        return {
+            **self.counters,
+            'in_flight': self.in_flight,
+            'latency_p50_ms': percentile(0.5),
+            'latency_p99_ms': percentile(0.99),
+            'partitions': len(self.queues),
+            **await self.queue_depths(),
+        }
 
 class RabbitMQ:
     def __init__(self, url: str = settings.RABBIT_URL):
         self.url = url
         self.connection: Optional[RobustConnection] = None
         self.channel: Optional[RobustChannel] = None
+        self.publisher: Optional[Publisher] = None
 
     async def connect(self):
         self.connection = await connect_robust(self.url)
-        self.channel = await self.connection.channel()
+        self.channel = await self.connection.channel(publisher_confirms=True)
+        # Очередь объявляется один раз, а не при каждой публикации
+        queues = await declare_forecast_queues(self.channel)
+        self.publisher = Publisher(self.connection, self.channel, queues)
 
     async def close(self):
         if self.channel and not self.channel.is_closed:
@@ -19,4 +171,7 @@ class RabbitMQ:
         if self.connection and not self.connection.is_closed:
             await self.connection.close()
 
-rabbitmq = RabbitMQ()
\ No newline at end of file
+    def is_connected(self) -> bool:
+        '''Соединение установлено (RobustConnection сбрасывает признак на время переподключения)'''
+        return (self.connection is not None and self.connection.connected.is_set()
+                and self.channel is not None and not self.channel.is_closed)
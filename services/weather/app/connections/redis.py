@@ -1,15 +1,35 @@
-import redis
+from redis.asyncio import Redis, BlockingConnectionPool
+from typing import Optional
+
 from app.core.config import settings
 
 class RedisClient:
-    def __init__(self):
-        self.client = redis.Redis(
-            host=settings.REDIS_HOST,
-            port=settings.REDIS_PORT,
-            decode_responses=True  # Автоматически декодирует bytes в str
+    def __init__(self,
+                 host: str = settings.REDIS_HOST,
+                 port: int = settings.REDIS_PORT,
+                 max_connections: int = settings.REDIS_MAX_CONNECTIONS):
+        self.host = host
+        self.port = port
+        self.max_connections = max_connections
+        self.pool: Optional[BlockingConnectionPool] = None
+        self.client: Optional[Redis] = None
+
+    async def connect(self):
+        # Ограниченный пул: при исчерпании запросы ждут свободное соединение, а не открывают новые
+        self.pool = BlockingConnectionPool(
+            host=self.host,
+            port=self.port,
+            max_connections=self.max_connections,
+            timeout=settings.REDIS_POOL_TIMEOUT  # Ответы - bytes: погода хранится в бинарном виде
         )
+        self.client = Redis(connection_pool=self.pool)
+        await self.client.ping()
 
-    async def ping(self):
-        return self.client.ping()
+    async def close(self):
+        if self.client is not None:
+            await self.client.aclose()
+        if self.pool is not None:
+            await self.pool.aclose()
 
-redis_client = RedisClient()
\ No newline at end of file
+    async def ping(self):
+        return await self.client.ping()
@@ -12,10 +12,69 @@ class Settings(BaseSettings):
 
     # API
     ARCHIVE_WEATHER_URL: str
+    HTTP_POOL_SIZE: int = 100
+    HTTP_POOL_SIZE_PER_HOST: int = 20
+    HTTP_KEEPALIVE_TIMEOUT: float = 60.0
+    HTTP_DNS_CACHE_TTL: int = 300
+    HTTP_TIMEOUT: float = 30.0
+    HTTP_CONNECT_TIMEOUT: float = 5.0
+
+    # Open-Meteo: общий для всех воркеров лимит запросов в секунду (0 - без лимита) и запас на всплеск
+    UPSTREAM_RATE_LIMIT: float = 10.0
+    UPSTREAM_RATE_BURST: int = 20
+    # Сколько запрос готов ждать токен лимита, прежде чем считать API недоступным (секунды)
+    UPSTREAM_RATE_WAIT: float = 5.0
+    # Таймаут одного вызова и повторы на 429/5xx с экспоненциальной задержкой
+    UPSTREAM_TIMEOUT: float = 10.0
+    UPSTREAM_RETRIES: int = 2
+    UPSTREAM_BACKOFF_BASE: float = 0.2
+    UPSTREAM_BACKOFF_MAX: float = 5.0
+    # Размыкатель цепи: число неудачных вызовов подряд и пауза до пробного вызова (секунды)
+    UPSTREAM_BREAKER_THRESHOLD: int = 5
+    UPSTREAM_BREAKER_RESET: float = 30.0
+
+    # Объединение одинаковых запросов к API: 'local' - в пределах процесса,
+    # 'redis' - дополнительно через блокировку в Redis между воркерами
+    WEATHER_COALESCE_MODE: Literal['local', 'redis'] = 'local'
+    WEATHER_COALESCE_LOCK_TTL: float = 30.0
+    WEATHER_COALESCE_LOCK_WAIT: float = 10.0
+
+    # Кеширование: последние WEATHER_RECENT_DAYS дней Open-Meteo ещё может уточнить,
+    # поэтому они живут WEATHER_RECENT_TTL секунд. Архив - WEATHER_ARCHIVE_TTL (0 - бессрочно)
+    WEATHER_RECENT_DAYS: int = 7
+    WEATHER_RECENT_TTL: int = 60 * 60 * 6
+    WEATHER_ARCHIVE_TTL: int = 0
+    # Кеш первого уровня в памяти процесса
+    WEATHER_L1_MAX_ITEMS: int = 50_000
+    WEATHER_L1_MAX_BYTES: int = 32 * 1024 * 1024
+
+    # Фоновый прогрев кеша для всех городов: окно в днях, период (с),
+    # пауза между запросами к API (с) и относительный разброс пауз
+    WARMUP_ENABLED: bool = False
+    WARMUP_WINDOW_DAYS: int = 30
+    WARMUP_INTERVAL: int = 60 * 60
+    WARMUP_REQUEST_INTERVAL: float = 1.0
+    WARMUP_JITTER: float = 0.5
+
+    # Максимальное ожидание готовности прогноза в GET /forecast?wait= (секунды)
+    FORECAST_MAX_WAIT: float = 30.0
+    # Время жизни статуса задачи прогноза: повторные запросы в этот период не ставятся в очередь
+    FORECAST_STATUS_TTL: int = 600
+    # Приоритет в очереди (0..RABBITMQ_MAX_PRIORITY) и срок, после которого воркер отбрасывает задачу
+    # (секунды): одиночные запросы пользователей идут раньше пакетных
+    FORECAST_PRIORITY_INTERACTIVE: int = 8
+    FORECAST_PRIORITY_BATCH: int = 2
+    FORECAST_DEADLINE_INTERACTIVE: int = 120
+    FORECAST_DEADLINE_BATCH: int = 600
+
+    # Проверка готовности (/health/ready): таймаут проверки каждой зависимости (секунды)
+    HEALTH_CHECK_TIMEOUT: float = 1.0
 
     # Redis
     REDIS_HOST: str
     REDIS_PORT: int
+    REDIS_MAX_CONNECTIONS: int = 50
+    REDIS_POOL_TIMEOUT: float = 5.0
 
     # RabbitMQ
     RABBITMQ_HOST: str
@@ -23,6 +82,16 @@ class Settings(BaseSettings):
     RABBITMQ_USER: str
     RABBITMQ_PASS: str
     RABBITMQ_FC_REQ_QUEUE: str
+    # Окно неподтверждённых публикаций и время ожидания подтверждения (секунды)
+    RABBITMQ_PUBLISH_WINDOW: int = 256
+    RABBITMQ_PUBLISH_TIMEOUT: float = 5.0
+    # Аргументы очереди прогнозов - должны совпадать с воркером: максимальный приоритет
+    # и задержка повтора неудачной задачи в очереди {RABBITMQ_FC_REQ_QUEUE}.retry (секунды)
+    RABBITMQ_MAX_PRIORITY: int = 10
+    RABBITMQ_RETRY_DELAY: int = 30
+    # Число партиций очереди прогнозов ({RABBITMQ_FC_REQ_QUEUE}.p{N}), как у воркеров: задачи
+    # города всегда попадают в одну партицию. 1 - одна общая очередь RABBITMQ_FC_REQ_QUEUE
+    RABBITMQ_PARTITIONS: int = 1
 
     @property
     def RABBIT_URL(self) -> str:
@@ -4,14 +4,47 @@ from app.services.weather import WeatherService
 from app.repositories.weather import WeatherRepository
 from app.services.forecast import ForecastService
 from app.repositories.forecast import ForecastRepository
-
-def get_weather_service() -> WeatherService:
-    repo = WeatherRepository()
-    return WeatherService(repo)
+from app.connections.openmeteo import OpenMeteoClient
+from app.utils.singleflight import SingleFlight
+from app.utils.lru import LRUCache
+from app.utils.notifier import ForecastNotifier
 
 def get_rabbitmq(request: Request):
     return request.app.state.rabbitmq
 
-def get_forecast_service(rabbitmq = Depends(get_rabbitmq)) -> ForecastService:
-    repo = ForecastRepository(rabbitmq)
-    return ForecastService(repo)
+def get_redis(request: Request):
+    return request.app.state.redis
+
+def get_http(request: Request):
+    return request.app.state.http
+
+def get_openmeteo(request: Request) -> OpenMeteoClient:
+    return request.app.state.openmeteo
+
+def get_weather_flight(request: Request) -> SingleFlight:
+    return request.app.state.weather_flight
+
+def get_weather_l1(request: Request) -> LRUCache:
+    return request.app.state.weather_l1
+
+def get_warmup(request: Request):
+    return request.app.state.warmup
+
+def get_startup(request: Request) -> dict:
+    return request.app.state.startup
+
+def get_forecast_notifier(request: Request) -> ForecastNotifier:
+    return request.app.state.forecast_notifier
+
+def get_weather_service(redis = Depends(get_redis),
+                        upstream = Depends(get_openmeteo),
+                        l1 = Depends(get_weather_l1),
+                        flight = Depends(get_weather_flight)) -> WeatherService:
+    repo = WeatherRepository(redis, upstream, l1)
+    return WeatherService(repo, flight)
+
+def get_forecast_service(rabbitmq = Depends(get_rabbitmq),
+                         redis = Depends(get_redis),
+                         notifier = Depends(get_forecast_notifier)) -> ForecastService:
+    repo = ForecastRepository(rabbitmq, redis)
+    return ForecastService(repo, notifier)
@@ -0,0 +1,78 @@
+from prometheus_client import Counter, Histogram
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.registry import Collector
+
+# Границы корзин под горячий путь: от попаданий в Redis (доли мс) до запросов к Open-Meteo (секунды)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+REDIS_READ_SECONDS = Histogram(
+    'weather_redis_read_seconds', 'Чтение погоды из Redis (промахи L1)',
+    ['op'], buckets=LATENCY_BUCKETS
+)
+REDIS_WRITE_SECONDS = Histogram(
+    'weather_redis_write_seconds', 'Запись погоды в Redis', buckets=LATENCY_BUCKETS
+)
+API_FETCH_SECONDS = Histogram(
+    'weather_api_fetch_seconds', 'Запрос к Open-Meteo', ['status'], buckets=LATENCY_BUCKETS
+)
+# Попадания L1 отдаются сборщиком ServiceStatsCollector, здесь - дни, дошедшие до Redis
+REDIS_LOOKUPS = Counter(
+    'weather_redis_lookups_total', 'Поиск дней погоды в Redis', ['result']
+)
+PUBLISH_SECONDS = Histogram(
+    'forecast_publish_seconds', 'Публикация задачи прогноза до подтверждения брокером',
+    buckets=LATENCY_BUCKETS
+)
+PUBLISH_FAILURES = Counter(
+    'forecast_publish_failures_total', 'Публикации задач прогноза без подтверждения'
+)
+
+class ServiceStatsCollector(Collector):
+    '''
+    Отдаёт уже существующие счётчики процесса (/stats) в формате Prometheus при каждом сборе.
+    С pid серии помечаются меткой pid: при нескольких воркерах /metrics отдаёт их рядом
+    с агрегированными по воркерам метриками, и серии разных воркеров не смешиваются
+    '''
+
+    def __init__(self, state, pid: int | None = None):
+        self.state = state
+        self.extra = {'pid': str(pid)} if pid is not None else {}
+
+    def _counter(self, name: str, documentation: str, values: dict, label: str) -> CounterMetricFamily:
+        family = CounterMetricFamily(name, documentation, labels=[label, *self.extra])
+        for key, value in values.items():
+            family.add_metric([key, *self.extra.values()], value)
+        return family
+
+    def _gauge(self, name: str, documentation: str, value: float) -> GaugeMetricFamily:
+        family = GaugeMetricFamily(name, documentation, labels=list(self.extra))
+        family.add_metric(list(self.extra.values()), value)
+        return family
+
+    def collect(self):
+        yield self._counter('weather_fetch', 'Запросы к Open-Meteo: инициированные и объединённые',
+                            dict(self.state.weather_flight.counters), 'kind')
+
+        l1 = self.state.weather_l1.stats()
+        yield self._counter('weather_l1_events', 'События L1-кеша погоды',
+                            {event: l1.get(event, 0) for event in ('hits', 'misses', 'evictions', 'expirations')},
+                            'event')
+        yield self._gauge('weather_l1_items', 'Записей в L1-кеше погоды', l1['items'])
+        yield self._gauge('weather_l1_bytes', 'Оценка объёма L1-кеша погоды', l1['bytes'])
+        yield self._gauge('weather_fetch_in_flight', 'Выполняющиеся запросы к Open-Meteo',
+                          self.state.weather_flight.in_flight)
+
+        upstream = self.state.openmeteo.stats()
+        yield self._counter('weather_upstream_events', 'Вызовы Open-Meteo и отказы клиента',
+                            {event: upstream[event] for event in ('requests', 'retries', 'throttled', 'rejected', 'failures')},
+                            'event')
+        yield self._gauge('weather_upstream_circuit_open', 'Цепь к Open-Meteo разомкнута',
+                          int(upstream['circuit'] != 'closed'))
+
+        waits = self.state.forecast_notifier.stats()
+        yield self._gauge('forecast_waiters', 'Клиенты, ожидающие прогноз (long-poll)', waits['waiting'])
+
+        publisher = self.state.rabbitmq.publisher
+        if publisher is not None:
+            yield self._gauge('forecast_publish_in_flight', 'Публикации, ожидающие подтверждения',
+                              publisher.in_flight)
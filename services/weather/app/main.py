@@ -1,18 +1,84 @@
+import time
+
+# Отсчёт холодного старта: импорт приложения и подключения воркера
+_import_started = time.perf_counter()
+
 from fastapi import FastAPI, Request, status
 from fastapi.responses import JSONResponse
 from fastapi.encoders import jsonable_encoder
 from fastapi.exceptions import RequestValidationError
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
+from prometheus_client import REGISTRY
+import asyncio
+import os
 
 from app.core.config import settings
-from app.connections.rabbitmq import rabbitmq
+from app.core.logger import logger
+from app.core.metrics import ServiceStatsCollector
+from app.connections.rabbitmq import RabbitMQ
+from app.connections.redis import RedisClient
+from app.connections.http import HttpClient
+from app.connections.openmeteo import OpenMeteoClient
+from app.utils.singleflight import SingleFlight
+from app.utils.lru import LRUCache
+from app.utils.notifier import ForecastNotifier
+from app.repositories.weather import WeatherRepository
+from app.services.weather import WeatherService
+from app.services.warmup import WarmupScheduler
 from app.api.main import api_router
 
+_imported_at = time.perf_counter()
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    await rabbitmq.connect()
+    # Соединения создаются в каждом воркере после запуска процесса, а не при импорте:
+    # при нескольких воркерах у каждого свои пулы Redis, HTTP и канал RabbitMQ
+    connect_started = time.perf_counter()
+    rabbitmq = RabbitMQ()
+    redis_client = RedisClient()
+    http_client = HttpClient()
+    await asyncio.gather(rabbitmq.connect(), redis_client.connect(), http_client.connect())
     app.state.rabbitmq = rabbitmq
+    app.state.redis = redis_client
+    app.state.http = http_client
+    app.state.openmeteo = OpenMeteoClient(http_client, redis_client)
+    app.state.weather_flight = SingleFlight()
+    app.state.weather_l1 = LRUCache(
+        max_items=settings.WEATHER_L1_MAX_ITEMS,
+        max_bytes=settings.WEATHER_L1_MAX_BYTES
+    )
+    app.state.forecast_notifier = ForecastNotifier(redis_client)
+    app.state.forecast_notifier.start()
+    stats_collector = ServiceStatsCollector(app.state)
+    REGISTRY.register(stats_collector)
+
+    app.state.warmup = None
+    warmup_task = None
+    if settings.WARMUP_ENABLED:
+        repo = WeatherRepository(redis_client, app.state.openmeteo, app.state.weather_l1)
+        app.state.warmup = WarmupScheduler(WeatherService(repo, app.state.weather_flight), redis_client)
+        warmup_task = asyncio.create_task(app.state.warmup.run_forever())
+
+    ready_at = time.perf_counter()
+    app.state.startup = {
+        'pid': os.getpid(),
+        'import_seconds': round(_imported_at - _import_started, 3),
+        'connect_seconds': round(ready_at - connect_started, 3),
+        'ready_seconds': round(ready_at - _import_started, 3)
+    }
+    logger.info(f'Worker {os.getpid()} ready in {app.state.startup["ready_seconds"]}s '
+                f'(import {app.state.startup["import_seconds"]}s, connect {app.state.startup["connect_seconds"]}s)')
+
     yield
+
+    if warmup_task is not None:
+        warmup_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await warmup_task
+    await app.state.forecast_notifier.stop()
+    REGISTRY.unregister(stats_collector)
+    await http_client.close()
+    await redis_client.close()
     await rabbitmq.close()
 
 app = FastAPI(
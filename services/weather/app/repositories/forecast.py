@@ -1,38 +1,96 @@
-import aio_pika
-
-from app.connections.redis import redis_client
+from app.connections.redis import RedisClient
 from app.connections.rabbitmq import RabbitMQ
 from app.schemas.weather import *
 from app.schemas.forecast import *
 from app.core.config import settings
 from app.core.logger import logger
+from datetime import datetime, timedelta, timezone
+
+# Постановка задач в очередь: статус queued ставится, только если задачи нет,
+# она завершилась ошибкой или была отброшена воркером по сроку
+CLAIM_SCRIPT = '''
+local claimed = {}
+for i, key in ipairs(KEYS) do
+    local status = redis.call('GET', key)
+    if status and status ~= 'failed' and status ~= 'expired' then
+        claimed[i] = 0
+    else
+        redis.call('SET', key, 'queued', 'EX', ARGV[1])
+        claimed[i] = 1
+    end
+end
+return claimed
+'''
 
 class ForecastRepository:
 
-    def __init__(self, rabbitmq: RabbitMQ):
+    def __init__(self, rabbitmq: RabbitMQ, redis: RedisClient):
         self.rabbitmq = rabbitmq
+        self.redis = redis
+
+    @staticmethod
+    def _status_key(task_id) -> str:
+        return f'forecast:status:{task_id}'
 
     async def get_forecast_from_redis(self, task_id) -> ForecastData:
         '''Получает прогноз из Redis'''
-        data = redis_client.client.get(f'forecast:{task_id}')
+        data = await self.redis.client.get(f'forecast:{task_id}')
         if not data:
             return None
         return ForecastData.model_validate_json(data)
+
+    async def get_forecasts_from_redis(self, task_ids: list) -> dict:
+        '''Получает несколько прогнозов из Redis одним MGET'''
+        values = await self.redis.client.mget([f'forecast:{task_id}' for task_id in task_ids])
+        return {
+            task_id: ForecastData.model_validate_json(data) if data else None
+            for task_id, data in zip(task_ids, values)
+        }
     
-    async def request_forecast_calculation(self, task_id, city, date):
-        msg = MQForecastRequest(
-            task_id=task_id,
-            city=city,
-            date_=date
-        )
-        
-        channel = self.rabbitmq.channel
-        queue = await channel.declare_queue(settings.RABBITMQ_FC_REQ_QUEUE, durable=True)
-
-        message_body = msg.model_dump_json().encode()
-        message = aio_pika.Message(body=message_body)
-        await channel.default_exchange.publish(
-            message,
-            routing_key=queue.name
-        )
-        logger.info(f'Forecast request sent to task queue: {city} {date}')
\ No newline at end of file
+    async def get_statuses_from_redis(self, task_ids: list) -> dict:
+        '''Состояния задач прогноза: task_id -> queued/running/done/failed или None'''
+        values = await self.redis.client.mget([self._status_key(task_id) for task_id in task_ids])
+        return {
+            task_id: value.decode() if value else None
+            for task_id, value in zip(task_ids, values)
+        }
+
+    async def claim_forecast_tasks(self, task_ids: list) -> list:
+        '''
+        Атомарно помечает задачи как queued. Возвращает task_id, которые удалось занять:
+        остальные уже стоят в очереди или рассчитываются
+        '''
+        claim = self.redis.client.register_script(CLAIM_SCRIPT)
+        claimed = await claim(keys=[self._status_key(task_id) for task_id in task_ids],
+                              args=[settings.FORECAST_STATUS_TTL])
+        return [task_id for task_id, ok in zip(task_ids, claimed) if ok]
+
+    async def release_forecast_tasks(self, task_ids: list):
+        '''Снимает статус с задач, которые не удалось опубликовать'''
+        await self.redis.client.delete(*(self._status_key(task_id) for task_id in task_ids))
+
+    async def request_forecast_calculation(self, task_id, city, date, model=None, interactive=True):
+        await self.request_forecast_calculations([(task_id, city, date, model)], interactive)
+
+    async def request_forecast_calculations(self, requests: list, interactive: bool = True):
+        '''
+        Публикует пачку задач (task_id, city, date, model) и дожидается подтверждения брокера.
+        Одиночные запросы пользователей получают более высокий приоритет и короткий срок
+        '''
+        if interactive:
+            priority, ttl = settings.FORECAST_PRIORITY_INTERACTIVE, settings.FORECAST_DEADLINE_INTERACTIVE
+        else:
+            priority, ttl = settings.FORECAST_PRIORITY_BATCH, settings.FORECAST_DEADLINE_BATCH
+        deadline = datetime.now(timezone.utc) + timedelta(seconds=ttl)
+        await self.rabbitmq.publisher.publish_many([
+            (city, MQForecastRequest(
+                task_id=task_id,
+                city=city,
+                date_=date,
+                engine=model,
+                deadline=deadline
+            ).model_dump_json(exclude_none=True).encode())
+            for task_id, city, date, model in requests
+        ], priority=priority)
+        for _, city, date, _ in requests:
+            logger.info(f'Forecast request sent to task queue: {city} {date}')
@@ -1,73 +1,203 @@
-from datetime import date
-import aiohttp
+from datetime import date, timedelta
+import time
+import numpy as np
 
-from app.connections.redis import redis_client
+from app.connections.redis import RedisClient
+from app.connections.openmeteo import OpenMeteoClient
 from app.schemas.weather import *
 from app.core.config import settings
 from app.core.logger import logger
+from app.core.metrics import REDIS_LOOKUPS, REDIS_READ_SECONDS, REDIS_WRITE_SECONDS
 from app.utils.cities import ALLOWED_CITIES_COORDS
+from app.utils.lru import LRUCache
+from app.utils import daily_store
 
 class WeatherRepository:
+    # Приблизительный размер WeatherData в памяти процесса для учёта объёма L1-кеша
+    L1_ENTRY_SIZE = 400
+
+    DAILY_PARAMS = [
+        "temperature_2m_mean",
+        "temperature_2m_min",
+        "temperature_2m_max",
+        "precipitation_sum",
+        "relative_humidity_2m_mean",
+        "relative_humidity_2m_max",
+        "relative_humidity_2m_min"
+    ]
+
+    def __init__(self, redis: RedisClient, upstream: OpenMeteoClient, l1: LRUCache):
+        self.redis = redis
+        self.upstream = upstream
+        self.l1 = l1
+
     @staticmethod
     def _generate_key(city, date: date) -> str:
         return f"weather:{city}:{date.isoformat()}"
-    
+
     @staticmethod
-    def _convert_openmeteo_to_weather(data: OpenMeteoResponse) -> WeatherData:
-        return WeatherData(
-            temp_min = data.daily.temperature_2m_min[0],
-            temp_avg = data.daily.temperature_2m_mean[0],
-            temp_max = data.daily.temperature_2m_max[0],
-            humidity_min = data.daily.relative_humidity_2m_min[0],
-            humidity_avg = data.daily.relative_humidity_2m_mean[0],
-            humidity_max = data.daily.relative_humidity_2m_max[0],
-            precipitation=data.daily.precipitation_sum[0]
-        )
+    def _ttl_for(day: date) -> int | None:
+        '''Время жизни записи в кеше в зависимости от давности даты (None - бессрочно)'''
+        if date.today() - day <= timedelta(days=settings.WEATHER_RECENT_DAYS):
+            return settings.WEATHER_RECENT_TTL
+        return settings.WEATHER_ARCHIVE_TTL or None
+
+    def _put_l1(self, key: str, weather: WeatherData, day: date, fetched_at: float) -> None:
+        '''
+        Кладёт день в L1 до того же момента, когда устареет его запись в Redis
+        (fetched_at - час получения из API), а не на полный срок от текущего чтения
+        '''
+        ttl = self._ttl_for(day)
+        if ttl is not None:
+            ttl = fetched_at * 3600 + ttl - time.time()
+            if ttl <= 0:
+                return
+        self.l1.set(key, weather, size=self.L1_ENTRY_SIZE, ttl=ttl)
+
+    def _decode_record(self, day: date, record: np.ndarray, now: float, allow_stale: bool = False) -> WeatherData | None:
+        '''Запись дня из Redis. Отсутствующие и устаревшие (для недавних дат, если не allow_stale) записи - None'''
+        fetched_at = record[0]
+        if fetched_at == 0:
+            return None
+        ttl = self._ttl_for(day)
+        if not allow_stale and ttl is not None and (now - fetched_at) * 3600 >= ttl:
+            return None
+        return WeatherData(**{
+            field: round(float(value), daily_store.DECIMALS)
+            for field, value in zip(daily_store.WEATHER_FIELDS, record[1:])
+        })
+
+    @staticmethod
+    def _convert_openmeteo_to_weather_range(data: OpenMeteoResponse) -> dict[date, WeatherData]:
+        '''Разбивает дневные массивы Open-Meteo по датам. Дни с пропусками отбрасываются'''
+        daily = data.daily
+        result = {}
+        for i, day in enumerate(daily.time):
+            values = dict(
+                temp_min = daily.temperature_2m_min[i],
+                temp_avg = daily.temperature_2m_mean[i],
+                temp_max = daily.temperature_2m_max[i],
+                humidity_min = daily.relative_humidity_2m_min[i],
+                humidity_avg = daily.relative_humidity_2m_mean[i],
+                humidity_max = daily.relative_humidity_2m_max[i],
+                precipitation = daily.precipitation_sum[i]
+            )
+            if any(v is None for v in values.values()):
+                continue
+            result[day] = WeatherData(**values)
+        return result
 
     async def save_weather_to_redis(self, city, date: date, weather: WeatherData) -> None:
         """Сохраняет данные погоды в Redis."""
-        key = self._generate_key(city, date)
-        
-        redis_client.client.set(
-            name=key,
-            value=weather.model_dump_json(),
-            ex=60 * 60 * 24 # 1 day
-        )
+        await self.save_weather_range_to_redis(city, {date: weather})
+
+    async def save_weather_range_to_redis(self, city, weather: dict[date, WeatherData]) -> None:
+        """Записывает дни в помесячные бинарные строки Redis одним пайплайном (и в L1-кеш)."""
+        now = daily_store.hours_now()
+        months = set()
+        async with self.redis.client.pipeline(transaction=False) as pipe:
+            for day, w in weather.items():
+                self._put_l1(self._generate_key(city, day), w, day, fetched_at=now)
+                key = daily_store.month_key(city, day)
+                months.add(key)
+                values = [getattr(w, field) for field in daily_store.WEATHER_FIELDS]
+                pipe.setrange(key, daily_store.record_offset(day), daily_store.encode_record(values, now))
+            # Свежесть недавних дней проверяется по времени получения записи, ключу - только архивный TTL
+            if settings.WEATHER_ARCHIVE_TTL:
+                for key in months:
+                    pipe.expire(key, settings.WEATHER_ARCHIVE_TTL)
+            with REDIS_WRITE_SECONDS.time():
+                await pipe.execute()
 
     async def get_weather_from_redis(self, city, date: date) -> WeatherData | None:
-        """Получает данные погоды из Redis."""
+        """Получает данные погоды из L1-кеша процесса, затем из Redis."""
         key = self._generate_key(city, date)
-        data = redis_client.client.get(key)
-        if not data:
+        if (w := self.l1.get(key)) is not None:
+            return w
+        offset = daily_store.record_offset(date)
+        with REDIS_READ_SECONDS.labels('day').time():
+            data = await self.redis.client.getrange(
+                daily_store.month_key(city, date), offset, offset + daily_store.RECORD_SIZE - 1
+            )
+        w = None
+        if len(data) == daily_store.RECORD_SIZE:
+            record = daily_store.decode_block(data)[0]
+            w = self._decode_record(date, record, daily_store.hours_now())
+        REDIS_LOOKUPS.labels('miss' if w is None else 'hit').inc()
+        if w is None:
             return None
         logger.info('Fetching weather data from Redis')
-        return WeatherData.model_validate_json(data)  # Десериализуем JSON в Pydantic-модель
+        self._put_l1(key, w, date, fetched_at=record[0])
+        return w
+
+    async def get_weather_range_from_redis(self, city, dates: list[date], allow_stale: bool = False) -> dict[date, WeatherData]:
+        """
+        Получает данные погоды за несколько дней: из L1-кеша и одним MGET помесячных строк Redis.
+        С allow_stale возвращаются и устаревшие записи (в L1 они не попадают).
+        """
+        result = {}
+        missing = []
+        for d in dates:
+            if (w := self.l1.get(self._generate_key(city, d))) is not None:
+                result[d] = w
+            else:
+                missing.append(d)
+        if not missing:
+            return result
+
+        keys = list(dict.fromkeys(daily_store.month_key(city, d) for d in missing))
+        with REDIS_READ_SECONDS.labels('range').time():
+            buffers = await self.redis.client.mget(keys)
+        blocks = {
+            key: daily_store.decode_block(buf)
+            for key, buf in zip(keys, buffers) if buf
+        }
+        now = daily_store.hours_now()
+        for d in missing:
+            block = blocks.get(daily_store.month_key(city, d))
+            if block is None or d.day > len(block):
+                continue
+            if (w := self._decode_record(d, block[d.day - 1], now)) is not None:
+                self._put_l1(self._generate_key(city, d), w, d, fetched_at=block[d.day - 1][0])
+                result[d] = w
+            elif allow_stale and (w := self._decode_record(d, block[d.day - 1], now, allow_stale=True)) is not None:
+                result[d] = w
+        hits = len(result) - (len(dates) - len(missing))
+        REDIS_LOOKUPS.labels('hit').inc(hits)
+        REDIS_LOOKUPS.labels('miss').inc(len(missing) - hits)
+        return result
+
+    def fetch_lock(self, key: str):
+        '''Распределённая блокировка на запрос к API по ключу кеша'''
+        return self.redis.client.lock(
+            f'lock:{key}',
+            timeout=settings.WEATHER_COALESCE_LOCK_TTL,
+            blocking_timeout=settings.WEATHER_COALESCE_LOCK_WAIT,
+            sleep=0.05
+        )
 
     async def get_weather_from_api(self, city, date_: date) -> WeatherData | None:
-        logger.info(f'Requesting weather in {city} on {date_.isoformat()} from API')
+        weather = await self.get_weather_range_from_api(city, date_, date_)
+        return weather.get(date_)
+
+    async def get_weather_range_from_api(self, city, start: date, end: date) -> dict[date, WeatherData]:
+        '''
+        Запрашивает погоду за интервал дат одним запросом к Open-Meteo.
+        Если API недоступен, бросает UpstreamUnavailable
+        '''
+        logger.info(f'Requesting weather in {city} from {start.isoformat()} to {end.isoformat()} from API')
         lat = ALLOWED_CITIES_COORDS[city][0]
         lon = ALLOWED_CITIES_COORDS[city][1]
-        async with aiohttp.ClientSession() as session:
-            params = OpenMeteoReqParams(
-                latitude = lat,
-                longitude = lon,
-                start_date = date_,
-                end_date = date_,
-                daily = [
-                    "temperature_2m_mean",
-                    "temperature_2m_min",
-                    "temperature_2m_max",
-                    "precipitation_sum",
-                    "relative_humidity_2m_mean",
-                    "relative_humidity_2m_max",
-                    "relative_humidity_2m_min"
-                ]
-            )
+        params = OpenMeteoReqParams(
+            latitude = lat,
+            longitude = lon,
+            start_date = start,
+            end_date = end,
+            daily = self.DAILY_PARAMS
+        )
 
-            async with session.get(url = settings.ARCHIVE_WEATHER_URL, params = params.to_api_params()) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    weather_response = OpenMeteoResponse(**data)
-                    return self._convert_openmeteo_to_weather(weather_response)
-                else:
-                    return None
+        data = await self.upstream.get_archive(params.to_api_params())
+        if data is None:
+            return {}
+        weather_response = OpenMeteoResponse(**data)
+        return self._convert_openmeteo_to_weather_range(weather_response)
@@ -1,14 +1,19 @@
 from pydantic import BaseModel, Field, field_validator
-from typing import Literal
+from typing import List, Literal, Optional
 from datetime import date, datetime, timedelta
 import uuid
 
+from app.core.config import settings
 from app.utils.cities import ALLOWED_CITIES_COORDS
 
+# Движки прогнозирования воркера (engines.py сервиса прогнозов)
+ForecastEngine = Literal['sklearn', 'numpy', 'incremental', 'climatology', 'seasonal-naive', 'ridge']
+
 class ForecastPostRequest(BaseModel):
     '''Параметры запроса прогноза по городу и дате'''
     city: str = Field(..., example='Moscow')
     date_: date = Field(..., alias='date', validation_alias='date_')
+    model: Optional[ForecastEngine] = Field(None, description="Движок прогноза; по умолчанию - движок воркера")
 
     @field_validator('city')
     def validate_city(cls, value: str) -> str:
@@ -26,15 +31,26 @@ class ForecastPostRequest(BaseModel):
     
 class ForecastTaskQuery(BaseModel):
     task_id: uuid.UUID
+    wait: float = Field(0, ge=0, le=settings.FORECAST_MAX_WAIT,
+                        description="Сколько секунд ждать готовности прогноза, если его ещё нет")
 
 class ForecastPostResponse(BaseModel):
     status: Literal['accepted', 'rejected']
     task_id: uuid.UUID
     msg: str
 
+# Состояния задачи прогноза (ключ forecast:status:{task_id}); expired - воркер отбросил задачу по сроку
+ForecastTaskStatus = Literal['queued', 'running', 'done', 'failed', 'expired']
+
+class ForecastStatusResponse(BaseModel):
+    '''Прогноз ещё не готов: текущее состояние задачи'''
+    task_id: uuid.UUID
+    status: ForecastTaskStatus
+
 class ForecastMetadata(BaseModel):
-    model: Literal['linear_regression'] = Field(..., description="Использованная модель прогнозирования")
+    model: str = Field(..., description="Использованная модель прогнозирования (движок)")
     predicted_at: datetime = Field(..., description="Время создания прогноза")
+    latency_ms: Optional[float] = Field(None, description="Время обучения и прогноза движком по пачке, мс")
     
 class Forecast(BaseModel):
     temp_min: float
@@ -48,7 +64,40 @@ class ForecastData(BaseModel):
 class ForecastResponse(ForecastData):
     pass
 
+# Все города на неделю вперёд (включая сегодня)
+MAX_BATCH_SIZE = len(ALLOWED_CITIES_COORDS) * 8
+
+class ForecastBatchPostRequest(BaseModel):
+    '''Пакетный запрос прогнозов по нескольким парам город/дата'''
+    items: List[ForecastPostRequest] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+
+class ForecastBatchItem(BaseModel):
+    city: str
+    date_: date = Field(..., alias='date')
+    model: Optional[ForecastEngine] = None
+    task_id: uuid.UUID
+    status: Literal['ready', 'accepted']
+
+class ForecastBatchPostResponse(BaseModel):
+    items: List[ForecastBatchItem]
+    msg: str
+
+class ForecastBatchQuery(BaseModel):
+    task_id: List[uuid.UUID] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+
+class ForecastBatchResult(BaseModel):
+    task_id: uuid.UUID
+    ready: bool
+    status: Optional[ForecastTaskStatus] = None
+    forecast: Optional[ForecastData] = None
+
+class ForecastBatchResponse(BaseModel):
+    results: List[ForecastBatchResult]
+
 class MQForecastRequest(BaseModel):
     task_id: uuid.UUID
     city: str
-    date_: date
\ No newline at end of file
+    date_: date
+    engine: Optional[ForecastEngine] = None
+    # Позже этого момента (UTC) воркер задачу не выполняет
+    deadline: Optional[datetime] = None
\ No newline at end of file
@@ -1,13 +1,13 @@
-from pydantic import BaseModel, Field, field_validator
-from datetime import date
-from typing import Optional, List
+from pydantic import BaseModel, Field, field_validator, model_validator
+from datetime import date, timedelta
+from typing import ClassVar, Optional, List
 
 from app.utils.cities import ALLOWED_CITIES_COORDS
 
 class WeatherQuery(BaseModel):
     '''Параметры запроса погоды в конкретном городе на определенную дату'''
     city: str = Field(..., description='Город', example="Moscow")
-    date_: date = Field(..., alias='date', lt=date.today())
+    date_: date = Field(..., alias='date')
 
     @field_validator('city')
     def validate_city(cls, value):
@@ -15,6 +15,13 @@ class WeatherQuery(BaseModel):
         if value not in allowed_cities:
             raise ValueError(f'City must be one of: {", ".join(allowed_cities)}')
         return value
+
+    @field_validator('date_')
+    def validate_date(cls, value: date) -> date:
+        # Граница считается при каждом запросе: Field(lt=...) зафиксировал бы день импорта
+        if value < date.today():
+            return value
+        raise ValueError(f'Date must be earlier than {date.today()}')
     
 
 class WeatherData(BaseModel):
@@ -35,6 +42,52 @@ class WeatherResponse(WeatherQuery):
     weather: WeatherData
 
 
+class WeatherRangeQuery(BaseModel):
+    '''Параметры запроса погоды в городе за интервал дат (включительно)'''
+    city: str = Field(..., description='Город', example="Moscow")
+    start: date = Field(..., description='Первая дата интервала')
+    end: date = Field(..., description='Последняя дата интервала')
+
+    MAX_DAYS: ClassVar[int] = 366
+
+    @field_validator('city')
+    def validate_city(cls, value):
+        allowed_cities = ALLOWED_CITIES_COORDS.keys()
+        if value not in allowed_cities:
+            raise ValueError(f'City must be one of: {", ".join(allowed_cities)}')
+        return value
+
+    @field_validator('end')
+    def validate_end(cls, value: date) -> date:
+        if value < date.today():
+            return value
+        raise ValueError(f'End must be earlier than {date.today()}')
+
+    @model_validator(mode='after')
+    def validate_range(self):
+        if self.start > self.end:
+            raise ValueError('start must not be later than end')
+        if (self.end - self.start).days + 1 > self.MAX_DAYS:
+            raise ValueError(f'Range must not exceed {self.MAX_DAYS} days')
+        return self
+
+    def dates(self) -> List[date]:
+        return [self.start + timedelta(days=i) for i in range((self.end - self.start).days + 1)]
+
+
+class WeatherDay(WeatherData):
+    '''Данные о погоде за конкретный день интервала'''
+    date_: date = Field(..., alias='date')
+
+
+class WeatherRangeResponse(BaseModel):
+    '''Ответ на запрос погоды за интервал. Дни без данных в ответ не попадают'''
+    city: str
+    start: date
+    end: date
+    days: List[WeatherDay]
+
+
 class OpenMeteoReqParams(BaseModel):
     latitude: float = Field(..., ge=-90, le=90, description="Широта от -90 до 90")
     longitude: float = Field(..., ge=-180, le=180, description="Долгота от -180 до 180")
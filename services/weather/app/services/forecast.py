@@ -6,32 +6,95 @@ import uuid
 from app.core.logger import logger
 from app.repositories.forecast import ForecastRepository
 from app.schemas.forecast import ForecastData
+from app.utils.notifier import ForecastNotifier
 
 class ForecastService:
-    def __init__(self, repo: ForecastRepository):
+    def __init__(self, repo: ForecastRepository, notifier: ForecastNotifier):
         self.repo = repo
+        self.notifier = notifier
 
     @staticmethod
-    def _generate_task_id(city: str, date_: date) -> uuid.UUID:
-        input_str = f"{city}:{date_.isoformat()}"
+    def _generate_task_id(city: str, date_: date, model: str = None) -> uuid.UUID:
+        # Прогнозы движка по умолчанию и явно выбранного движка - разные задачи
+        input_str = f"{city}:{date_.isoformat()}" if model is None else f"{city}:{date_.isoformat()}:{model}"
         hash_obj = hashlib.sha256(input_str.encode('utf-8'))
         uuid_bytes = hash_obj.digest()[:16]
         return uuid.UUID(bytes=uuid_bytes)
 
-    async def get_forecast(self, task_id) -> ForecastData:
-        '''Получение прогноза'''
+    async def get_forecast(self, task_id, wait: float = 0) -> ForecastData:
+        '''Получение прогноза. Если его ещё нет, ждёт уведомления воркера до wait секунд'''
         if (fc := await self.repo.get_forecast_from_redis(task_id)) is not None:
             return fc
-        return None
+        if not wait:
+            return None
+
+        async with self.notifier.subscribe(task_id) as done:
+            # Прогноз мог быть записан между первой проверкой и подпиской
+            if (fc := await self.repo.get_forecast_from_redis(task_id)) is not None:
+                return fc
+            try:
+                await asyncio.wait_for(done, wait)
+            except asyncio.TimeoutError:
+                self.notifier.counters['timeouts'] += 1
+                return None
+        return await self.repo.get_forecast_from_redis(task_id)
         
-    async def request_forecast(self, city, date: date) -> uuid.UUID:
+    async def request_forecast(self, city, date: date, model: str = None) -> uuid.UUID:
         '''Запрос нового прогноза'''
-        task_id = self._generate_task_id(city, date)
+        task_id = self._generate_task_id(city, date, model)
 
         fc = await self.repo.get_forecast_from_redis(task_id)
         if fc is None:
-            # Закинуть сообщение
-            asyncio.create_task(self.repo.request_forecast_calculation(task_id, city, date))
+            await self._enqueue([(task_id, city, date, model)], interactive=True)
             return task_id
         logger.info(f'Forecast already available: {city} {date}')
-        return None
\ No newline at end of file
+        return None
+
+    async def _enqueue(self, tasks: list, interactive: bool):
+        '''
+        Ставит в очередь задачи (task_id, city, date, model), которые ещё не ожидают расчёта.
+        Повторные запросы той же пары город/дата возвращают тот же task_id без новой публикации
+        '''
+        claimed = set(await self.repo.claim_forecast_tasks([task[0] for task in tasks]))
+        if not claimed:
+            return
+        try:
+            await self.repo.request_forecast_calculations(
+                [task for task in tasks if task[0] in claimed], interactive
+            )
+        except Exception:
+            await self.repo.release_forecast_tasks(list(claimed))
+            raise
+
+    async def get_forecast_status(self, task_id) -> str:
+        '''Состояние задачи прогноза или None, если она неизвестна'''
+        return (await self.repo.get_statuses_from_redis([task_id]))[task_id]
+
+    async def request_forecast_batch(self, items: list) -> list:
+        '''
+        Пакетный запрос прогнозов по (city, date, model).
+        Возвращает (city, date, model, task_id, ready) для каждой уникальной тройки
+        '''
+        tasks = {}
+        for city, date_, model in items:
+            tasks.setdefault(self._generate_task_id(city, date_, model), (city, date_, model))
+
+        existing = await self.repo.get_forecasts_from_redis(list(tasks))
+        missing = [
+            (task_id, *task)
+            for task_id, task in tasks.items() if existing[task_id] is None
+        ]
+        if missing:
+            await self._enqueue(missing, interactive=False)
+
+        return [
+            (city, date_, model, task_id, existing[task_id] is not None)
+            for task_id, (city, date_, model) in tasks.items()
+        ]
+
+    async def get_forecast_batch(self, task_ids: list) -> dict:
+        '''Получение нескольких прогнозов: task_id -> (прогноз или None, состояние задачи)'''
+        task_ids = list(dict.fromkeys(task_ids))
+        forecasts = await self.repo.get_forecasts_from_redis(task_ids)
+        statuses = await self.repo.get_statuses_from_redis(task_ids)
+        return {task_id: (forecasts[task_id], statuses[task_id]) for task_id in task_ids}
\ No newline at end of file
@@ -0,0 +1,81 @@
+from datetime import date, timedelta
+import asyncio
+import random
+import time
+import uuid
+
+from app.connections.redis import RedisClient
+from app.core.config import settings
+from app.core.logger import logger
+from app.services.weather import WeatherService
+from app.utils.cities import ALLOWED_CITIES_COORDS
+
+class WarmupScheduler:
+    '''
+    Фоновый прогрев кеша погоды: для каждого разрешённого города поддерживает
+    в Redis скользящее окно последних WARMUP_WINDOW_DAYS дней, чтобы холодные
+    запросы к Open-Meteo не попадали на пользовательский путь.
+    '''
+
+    LOCK_KEY = 'warmup:lock'
+
+    def __init__(self, service: WeatherService, redis: RedisClient):
+        self.service = service
+        self.redis = redis
+        self.stats = {
+            'runs': 0,
+            'skipped': 0,
+            'failures': 0,
+            'last_started_at': None,
+            'last_duration_s': None,
+            'last_coverage': None,
+        }
+
+    def window(self) -> tuple[date, date]:
+        # Как у воркера прогнозов: история доступна до позавчерашнего дня
+        end = date.today() - timedelta(days=2)
+        start = end - timedelta(days=settings.WARMUP_WINDOW_DAYS - 1)
+        return start, end
+
+    async def run_once(self) -> dict:
+        '''Один проход прогрева по всем городам. Возвращает длительность и покрытие окна'''
+        start, end = self.window()
+        expected = (end - start).days + 1
+        started = time.perf_counter()
+        self.stats['last_started_at'] = time.time()
+
+        covered = {}
+        cities = list(ALLOWED_CITIES_COORDS)
+        random.shuffle(cities)
+        for i, city in enumerate(cities):
+            if i:
+                # Ограничение частоты запросов к API с разбросом, чтобы не создавать всплесков
+                await asyncio.sleep(settings.WARMUP_REQUEST_INTERVAL * random.uniform(1, 1 + settings.WARMUP_JITTER))
+            try:
+                days = await self.service.get_weather_range(city, start, end)
+                covered[city] = len(days)
+            except Exception:
+                logger.exception(f'Warm-up failed for {city}')
+                covered[city] = 0
+
+        duration = time.perf_counter() - started
+        coverage = sum(covered.values()) / (expected * len(cities))
+        self.stats['runs'] += 1
+        self.stats['last_duration_s'] = round(duration, 3)
+        self.stats['last_coverage'] = round(coverage, 4)
+        logger.info(f'Warm-up {start}..{end} done in {duration:.1f}s, coverage {coverage:.1%}')
+        return {'start': start, 'end': end, 'duration_s': duration, 'coverage': coverage, 'days': covered}
+
+    async def run_forever(self) -> None:
+        '''Периодический прогрев. Среди нескольких воркеров за интервал его выполняет один'''
+        while True:
+            token = uuid.uuid4().hex
+            try:
+                if await self.redis.client.set(self.LOCK_KEY, token, nx=True, ex=settings.WARMUP_INTERVAL):
+                    await self.run_once()
+                else:
+                    self.stats['skipped'] += 1
+            except Exception:
+                self.stats['failures'] += 1
+                logger.exception('Warm-up run failed')
+            await asyncio.sleep(settings.WARMUP_INTERVAL * random.uniform(1, 1 + settings.WARMUP_JITTER))
@@ -1,12 +1,18 @@
-from datetime import date
-import asyncio
+from datetime import date, timedelta
+from contextlib import suppress
+from redis.exceptions import LockError
 
+from app.connections.openmeteo import UpstreamUnavailable
+from app.core.config import settings
+from app.core.logger import logger
 from app.repositories.weather import WeatherRepository
 from app.schemas.weather import WeatherData
+from app.utils.singleflight import SingleFlight
 
 class WeatherService:
-    def __init__(self, repo: WeatherRepository):
+    def __init__(self, repo: WeatherRepository, flight: SingleFlight):
         self.repo = repo
+        self.flight = flight
 
     async def get_weather(self, city, date: date) -> WeatherData:
         '''Запрос погоды из Redis-кеша. В случае отсутствия обращение к API'''
@@ -14,13 +20,72 @@ class WeatherService:
         if (w := await self.repo.get_weather_from_redis(city, date)) is not None:
             return w
         
-        # Если нет в кеше - запрашиваем API
-        if (w := await self.repo.get_weather_from_api(city, date)) is not None:
-            # Сохраняем в кеш (не дожидаемся завершения)
-            asyncio.create_task(self.repo.save_weather_to_redis(city, date, w))
-            return w
-        
-        return None
+        # Если нет в кеше - запрашиваем API (параллельные промахи по ключу объединяются)
+        key = self.repo._generate_key(city, date)
+        try:
+            weather = await self.flight.do(key, lambda: self._fetch_and_cache(key, city, date, date))
+        except UpstreamUnavailable as e:
+            weather = await self._stale_or_raise(city, [date], e)
+        return weather.get(date)
+
+    async def get_weather_range(self, city, start: date, end: date) -> dict[date, WeatherData]:
+        '''Погода за интервал дат. Недостающие в кеше дни запрашиваются у API одним запросом'''
+        dates = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+        weather = await self.repo.get_weather_range_from_redis(city, dates)
+
+        missing = [d for d in dates if d not in weather]
+        if missing:
+            first, last = missing[0], missing[-1]
+            key = f'{self.repo._generate_key(city, first)}..{last.isoformat()}'
+            try:
+                fetched = await self.flight.do(key, lambda: self._fetch_and_cache(key, city, first, last))
+            except UpstreamUnavailable as e:
+                fetched = await self._stale_or_raise(city, missing, e, partial=bool(weather))
+            weather.update({d: w for d, w in fetched.items() if d not in weather})
+
+        return dict(sorted(weather.items()))
+
+    async def _stale_or_raise(self, city, dates: list[date], error: UpstreamUnavailable,
+                              partial: bool = False) -> dict[date, WeatherData]:
+        '''
+        API недоступен: отдаём устаревшие записи из Redis, если они есть.
+        Если нет ни их, ни уже найденных свежих (partial), пробрасываем UpstreamUnavailable
+        '''
+        stale = await self.repo.get_weather_range_from_redis(city, dates, allow_stale=True)
+        if not stale and not partial:
+            raise error
+        self.flight.counters['stale_served'] += len(stale)
+        logger.warning(f'Upstream unavailable, serving {len(stale)} stale day(s) for {city}')
+        return stale
+
+    async def _fetch_and_cache(self, key, city, start: date, end: date) -> dict[date, WeatherData]:
+        '''Запрос к API с сохранением в кеш. Выполняется одним «лидером» на ключ'''
+        if settings.WEATHER_COALESCE_MODE != 'redis':
+            return await self._fetch_from_api(city, start, end)
+
+        lock = self.repo.fetch_lock(key)
+        # Если блокировку не удалось получить за отведённое время, идём в API сами
+        acquired = await lock.acquire()
+        try:
+            if acquired:
+                # Пока ждали блокировку, другой воркер мог уже сохранить данные
+                dates = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+                cached = await self.repo.get_weather_range_from_redis(city, dates)
+                if len(cached) == len(dates):
+                    self.flight.counters['coalesced_remote'] += 1
+                    return cached
+            return await self._fetch_from_api(city, start, end)
+        finally:
+            if acquired:
+                with suppress(LockError):
+                    await lock.release()
+
+    async def _fetch_from_api(self, city, start: date, end: date) -> dict[date, WeatherData]:
+        weather = await self.repo.get_weather_range_from_api(city, start, end)
+        if weather:
+            # Дожидаемся записи, чтобы следующие запросы уже попали в кеш
+            await self.repo.save_weather_range_to_redis(city, weather)
+        return weather
     
     async def request_forecast(self, city, date: date):
         self.repo.put_forecast_request
@@ -0,0 +1,47 @@
+import time
+
+class CircuitBreaker:
+    '''
+    Размыкатель цепи для внешнего API.
+
+    После threshold неудач подряд цепь размыкается и вызовы отклоняются сразу.
+    Через reset_timeout секунд пропускается один пробный вызов: успех замыкает
+    цепь, неудача снова размыкает её.
+    '''
+
+    def __init__(self, threshold: int, reset_timeout: float):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+
+    def allow(self) -> bool:
+        if self.state == 'closed':
+            return True
+        if self.state == 'open':
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            self.state = 'half_open'
+        # Полуоткрытое состояние: одновременно идёт только один пробный вызов
+        if self._probing:
+            return False
+        self._probing = True
+        return True
+
+    def success(self) -> None:
+        self.state = 'closed'
+        self.failures = 0
+        self._probing = False
+
+    def cancel(self) -> None:
+        '''Вызов не дошёл до API или был прерван: его исход не учитывается'''
+        self._probing = False
+
+    def failure(self) -> None:
+        self.failures += 1
+        self._probing = False
+        if self.state == 'half_open' or self.failures >= self.threshold:
+            self.state = 'open'
+            self.opened_at = time.monotonic()
@@ -0,0 +1,48 @@
+'''
+Компактное хранение дневной погоды в Redis: одна бинарная строка на город и месяц.
+
+Запись дня - RECORD_FIELDS значений float32 (little-endian) по смещению
+(день месяца - 1) * RECORD_SIZE. Первое значение - время получения данных
+в часах от эпохи (0 - дня нет), далее поля WeatherData в порядке WEATHER_FIELDS.
+Незаписанные дни Redis заполняет нулями при SETRANGE, поэтому они читаются как отсутствующие.
+Формат читает и воркер прогнозов (services/forecast/history.py).
+'''
+import time
+from datetime import date
+from typing import Sequence
+
+import numpy as np
+
+WEATHER_FIELDS = (
+    'temp_min', 'temp_avg', 'temp_max',
+    'humidity_min', 'humidity_avg', 'humidity_max',
+    'precipitation'
+)
+RECORD_DTYPE = np.dtype('<f4')
+RECORD_FIELDS = 1 + len(WEATHER_FIELDS)
+RECORD_SIZE = RECORD_FIELDS * RECORD_DTYPE.itemsize
+# float32 хранит ~7 значащих цифр, исходные данные Open-Meteo - не больше 2 знаков после запятой
+DECIMALS = 3
+
+
+def month_key(city: str, day: date) -> str:
+    return f'weather:ts:{city}:{day:%Y-%m}'
+
+
+def record_offset(day: date) -> int:
+    return (day.day - 1) * RECORD_SIZE
+
+
+def hours_now() -> float:
+    return float(int(time.time() // 3600))
+
+
+def encode_record(values: Sequence[float], fetched_at: float) -> bytes:
+    return np.array([fetched_at, *values], dtype=RECORD_DTYPE).tobytes()
+
+
+def decode_block(buf: bytes) -> np.ndarray:
+    '''Записи месяца (или одного дня) как массив (дни, RECORD_FIELDS) без копирования буфера'''
+    records = np.frombuffer(buf, dtype=RECORD_DTYPE)
+    n_days = len(records) // RECORD_FIELDS
+    return records[:n_days * RECORD_FIELDS].reshape(n_days, RECORD_FIELDS)
@@ -0,0 +1,57 @@
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Hashable, Optional
+
+class LRUCache:
+    '''
+    Кеш в памяти процесса с вытеснением давно не использованных записей (LRU).
+
+    Ограничен числом записей и суммарным (приблизительным) объёмом в байтах,
+    для каждой записи можно задать время жизни.
+    '''
+
+    def __init__(self, max_items: int, max_bytes: int):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        # key -> (value, size, expires_at)
+        self._data: OrderedDict[Hashable, tuple[Any, int, Optional[float]]] = OrderedDict()
+        self.counters = Counter(hits=0, misses=0, evictions=0, expirations=0)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            self.counters['misses'] += 1
+            return None
+        value, size, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            self._remove(key)
+            self.counters['expirations'] += 1
+            self.counters['misses'] += 1
+            return None
+        self._data.move_to_end(key)
+        self.counters['hits'] += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, size: int, ttl: Optional[float] = None) -> None:
+        if size > self.max_bytes:
+            return
+        if key in self._data:
+            self._remove(key)
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        self._data[key] = (value, size, expires_at)
+        self.size_bytes += size
+        while len(self._data) > self.max_items or self.size_bytes > self.max_bytes:
+            oldest = next(iter(self._data))
+            self._remove(oldest)
+            self.counters['evictions'] += 1
+
+    def _remove(self, key: Hashable) -> None:
+        _, size, _ = self._data.pop(key)
+        self.size_bytes -= size
+
+    def stats(self) -> dict:
+        return {**self.counters, 'items': len(self._data), 'bytes': self.size_bytes}
@@ -0,0 +1,75 @@
+from collections import Counter, defaultdict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+import asyncio
+
+from redis.exceptions import RedisError
+
+from app.connections.redis import RedisClient
+from app.core.logger import logger
+
+class ForecastNotifier:
+    '''
+    Ожидание готовности прогнозов без опроса Redis. Воркер после записи
+    forecast:{task_id} публикует task_id в канал CHANNEL; процесс держит одну
+    подписку на канал и будит всех клиентов, ожидающих этот task_id.
+    '''
+
+    CHANNEL = 'forecast:done'
+    RECONNECT_DELAY = 1.0
+
+    def __init__(self, redis: RedisClient):
+        self.redis = redis
+        self._waiters: defaultdict[str, set[asyncio.Future]] = defaultdict(set)
+        self._task: asyncio.Task | None = None
+        self.counters = Counter(waits=0, notified=0, timeouts=0)
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    @asynccontextmanager
+    async def subscribe(self, task_id) -> AsyncIterator[asyncio.Future]:
+        '''Регистрирует ожидание task_id. Future завершается, когда воркер сообщит о готовности'''
+        key = str(task_id)
+        future = asyncio.get_running_loop().create_future()
+        self._waiters[key].add(future)
+        self.counters['waits'] += 1
+        try:
+            yield future
+        finally:
+            waiters = self._waiters.get(key)
+            if waiters is not None:
+                waiters.discard(future)
+                if not waiters:
+                    del self._waiters[key]
+
+    def stats(self) -> dict:
+        return {**self.counters, 'waiting': sum(len(waiters) for waiters in self._waiters.values())}
+
+    def _notify(self, key: str) -> None:
+        for future in self._waiters.pop(key, ()):
+            if not future.done():
+                future.set_result(None)
+                self.counters['notified'] += 1
+
+    async def _listen(self) -> None:
+        while True:
+            pubsub = self.redis.client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(self.CHANNEL)
+                async for message in pubsub.listen():
+                    self._notify(message['data'].decode())
+            except RedisError:
+                logger.exception('Forecast notification subscription lost, reconnecting')
+            finally:
+                await pubsub.aclose()
+            await asyncio.sleep(self.RECONNECT_DELAY)
@@ -0,0 +1,39 @@
+import asyncio
+from collections import Counter
+from typing import Awaitable, Callable, Dict, TypeVar
+
+T = TypeVar('T')
+
+class SingleFlight:
+    '''
+    Объединение параллельных вызовов с одинаковым ключом (single-flight).
+
+    Первый вызов по ключу запускает задачу, остальные ждут её результат.
+    Отмена одного из ожидающих не отменяет общую задачу.
+    '''
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.counters = Counter(originated=0, coalesced=0)
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._inflight)
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._inflight.get(key)
+        if task is None:
+            self.counters['originated'] += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+        else:
+            self.counters['coalesced'] += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Помечаем исключение полученным, даже если все ожидающие были отменены
+        if not task.cancelled():
+            task.exception()
@@ -0,0 +1,33 @@
+'''
+Разовый прогрев кеша погоды вне веб-сервиса (например, из cron):
+    python -m app.warmup
+'''
+import asyncio
+import json
+
+from app.connections.redis import RedisClient
+from app.connections.http import HttpClient
+from app.connections.openmeteo import OpenMeteoClient
+from app.repositories.weather import WeatherRepository
+from app.services.weather import WeatherService
+from app.services.warmup import WarmupScheduler
+from app.utils.lru import LRUCache
+from app.utils.singleflight import SingleFlight
+
+async def main():
+    redis_client = RedisClient()
+    http_client = HttpClient()
+    await redis_client.connect()
+    await http_client.connect()
+    try:
+        # Кеш в памяти этому процессу не нужен: данные сразу пишутся в Redis
+        repo = WeatherRepository(redis_client, OpenMeteoClient(http_client, redis_client), LRUCache(max_items=0, max_bytes=0))
+        scheduler = WarmupScheduler(WeatherService(repo, SingleFlight()), redis_client)
+        result = await scheduler.run_once()
+        print(json.dumps(result, default=str))
+    finally:
+        await http_client.close()
+        await redis_client.close()
+
+if __name__ == '__main__':
+    asyncio.run(main())
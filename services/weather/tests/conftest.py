@@ -0,0 +1,6 @@
+import os
+
+# Настройки сервиса читаются при импорте app: для тестов хватает заглушек подключений
+for name in ('PROJECT_NAME', 'WEATHER_HOST', 'ARCHIVE_WEATHER_URL', 'REDIS_HOST', 'REDIS_PORT',
+             'RABBITMQ_HOST', 'RABBITMQ_PORT', 'RABBITMQ_USER', 'RABBITMQ_PASS', 'RABBITMQ_FC_REQ_QUEUE'):
+    os.environ.setdefault(name, '1' if name.endswith('PORT') else 'test')
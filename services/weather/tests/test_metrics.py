@@ -0,0 +1,38 @@
+from types import SimpleNamespace
+
+from app.core.metrics import ServiceStatsCollector
+from app.utils.lru import LRUCache
+from app.utils.singleflight import SingleFlight
+
+
+class FakeUpstream:
+    def stats(self):
+        return dict(requests=3, retries=1, throttled=0, rejected=0, failures=0, circuit='closed')
+
+
+class FakeNotifier:
+    def stats(self):
+        return {'waiting': 2}
+
+
+def make_state():
+    return SimpleNamespace(
+        weather_flight=SingleFlight(),
+        weather_l1=LRUCache(max_items=10, max_bytes=1024),
+        openmeteo=FakeUpstream(),
+        forecast_notifier=FakeNotifier(),
+        rabbitmq=SimpleNamespace(publisher=None)
+    )
+
+
+def test_collector_labels_every_series_with_pid():
+    families = list(ServiceStatsCollector(make_state(), pid=123).collect())
+    samples = [sample for family in families for sample in family.samples]
+    assert samples
+    assert all(sample.labels.get('pid') == '123' for sample in samples)
+    assert any(sample.name == 'forecast_waiters' and sample.value == 2 for sample in samples)
+
+
+def test_collector_without_pid_has_no_extra_label():
+    families = list(ServiceStatsCollector(make_state()).collect())
+    assert all('pid' not in sample.labels for family in families for sample in family.samples)
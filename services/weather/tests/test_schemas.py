@@ -0,0 +1,42 @@
+from datetime import date, timedelta
+
+import pytest
+from pydantic import ValidationError
+
+from app.schemas import weather
+from app.schemas.weather import WeatherQuery, WeatherRangeQuery
+
+
+class FrozenDate(date):
+    '''date, у которого «сегодня» задаёт тест'''
+    frozen: date = date.today()
+
+    @classmethod
+    def today(cls):
+        return cls.frozen
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    monkeypatch.setattr(weather, 'date', FrozenDate)
+    return FrozenDate
+
+
+def test_range_end_limit_follows_clock(clock):
+    # Через несколько дней после импорта модуля вчерашний день всё ещё допустим
+    clock.frozen = date.today() + timedelta(days=5)
+    end = clock.frozen - timedelta(days=1)
+    query = WeatherRangeQuery(city='Moscow', start=end - timedelta(days=30), end=end)
+    assert query.end == end
+
+    with pytest.raises(ValidationError):
+        WeatherRangeQuery(city='Moscow', start=end, end=clock.frozen)
+
+
+def test_weather_date_limit_follows_clock(clock):
+    clock.frozen = date.today() + timedelta(days=5)
+    day = clock.frozen - timedelta(days=2)
+    assert WeatherQuery(city='Moscow', date=day).date_ == day
+
+    with pytest.raises(ValidationError):
+        WeatherQuery(city='Moscow', date=clock.frozen)
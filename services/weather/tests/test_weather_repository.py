@@ -0,0 +1,46 @@
+import time
+from datetime import date, timedelta
+
+from app.core.config import settings
+from app.repositories.weather import WeatherRepository
+from app.schemas.weather import WeatherData
+from app.utils import daily_store
+from app.utils.lru import LRUCache
+
+WEATHER = WeatherData(temp_min=1, temp_avg=2, temp_max=3, humidity_min=40, humidity_avg=50,
+                      humidity_max=60, precipitation=0.5)
+
+
+def make_repo() -> WeatherRepository:
+    return WeatherRepository(None, None, LRUCache(max_items=100, max_bytes=1 << 20))
+
+
+def l1_expires_in(repo: WeatherRepository, key: str) -> float:
+    return repo.l1._data[key][2] - time.monotonic()
+
+
+def test_l1_expiry_capped_by_redis_freshness():
+    repo = make_repo()
+    recent = date.today() - timedelta(days=1)
+    ttl_hours = settings.WEATHER_RECENT_TTL / 3600
+    now = daily_store.hours_now()
+
+    # Запись из Redis, которой осталось жить около часа: в L1 - не дольше этого часа
+    repo._put_l1('nearly-stale', WEATHER, recent, fetched_at=now - ttl_hours + 1)
+    assert 0 < l1_expires_in(repo, 'nearly-stale') <= 3600
+
+    # Только что полученная запись живёт почти весь срок
+    repo._put_l1('fresh', WEATHER, recent, fetched_at=now)
+    assert l1_expires_in(repo, 'fresh') > settings.WEATHER_RECENT_TTL - 3600
+
+    # Уже устаревшая в Redis запись в L1 не попадает
+    repo._put_l1('stale', WEATHER, recent, fetched_at=now - ttl_hours - 1)
+    assert repo.l1.get('stale') is None
+
+
+def test_l1_archive_days_follow_archive_ttl(monkeypatch):
+    monkeypatch.setattr(settings, 'WEATHER_ARCHIVE_TTL', 0)
+    repo = make_repo()
+    archive = date.today() - timedelta(days=settings.WEATHER_RECENT_DAYS + 30)
+    repo._put_l1('archive', WEATHER, archive, fetched_at=0)
+    assert repo.l1._data['archive'][2] is None